@@ -2,7 +2,13 @@
 
 import sys
 import struct
-from SHA256 import SHA256
+import binascii
+from SHA256 import SHA256, FastSHA256
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 SWIDTab = b'TN0BYX18S5HZ4IA67DGF3LPCJQRUK9MW2VE'
 
@@ -32,49 +38,83 @@ class MT_SHA256(SHA256):
     K = SHA256_K
     INITIAL_STATE = SHA256.State(*SHA256_I)
 
+class MT_FastSHA256(FastSHA256):
+    K = SHA256_K
+    INITIAL_STATE = SHA256.State(*SHA256_I)
+
+MTB64Chars = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+MTB64Pad = b"="
+MTB64Whitespace = b" \t\r\n\v\f"
+
+# Reverse lookup table, character -> 6 bit value (0xFF for invalid characters)
+MTB64Index = bytes(MTB64Chars.index(c) if c in MTB64Chars else 0xFF for c in range(256))
+
+# MTBase64 is regular BASE64 with the bytes of every 3 byte group and the
+# characters of every 4 character group in reversed order, i.e. the 24 bit
+# groups are little endian instead of big endian. Complete groups are therefore
+# converted with binascii, only the incomplete last group is done by hand.
+def _reverseGroups(data, size):
+    ret = bytearray(len(data))
+    for i in range(size):
+        ret[i::size] = data[size - 1 - i::size]
+    return ret
+
 def MTBse64Encode(s, padd = False):
-    b64s = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
-    b64p = "="
-    ret = ""
-    left = 0
-    for i in range(0, len(s)):
-        if left == 0:
-            ret += chr(b64s[s[i] & 0x3F])
-            left = 2
-        else:
-            if left == 6:
-                ret += chr(b64s[s[i - 1] >> 2])
-                ret += chr(b64s[s[i] & 0x3F])
-                left = 2
-            else:
-                index1 = s[i - 1] >> (8 - left)
-                index2 = s[i] << (left)
-                index = (index1 | index2) & 0x3F
-                ret += chr(b64s[index])
-                left += 2
-    if left != 0:
-        ret += chr(b64s[s[len(s) - 1] >> (8 - left)])
+    s = memoryview(s).cast('B')
+    full = len(s) - len(s) % 3
+    ret = _reverseGroups(binascii.b2a_base64(_reverseGroups(s[:full], 3), newline = False), 4)
+    if full != len(s):
+        value = int.from_bytes(s[full:], 'little')
+        ret += bytes(MTB64Chars[(value >> (6 * i)) & 0x3F] for i in range(len(s) - full + 1))
     if(padd):
-        for i in range(0, (4 - len(ret) % 4) % 4):
-            ret += b64p
-    return ret
+        ret += MTB64Pad * ((4 - len(ret) % 4) % 4)
+    return ret.decode('ascii')
+
+class MTBse64Decoder(object):
+    """Streaming MTBase64 decoder. Data (str or bytes) can be passed in chunks
+    of arbitrary size to update(), which returns the bytes decoded so far.
+    Whitespace is ignored and padding ends a group, so a dump of concatenated
+    keys can be fed in at once. final() returns the remaining bytes."""
+
+    def __init__(self):
+        self.pending = b''
+
+    @staticmethod
+    def _decodeGroups(s, flush):
+        full = len(s) - len(s) % 4
+        ret = _reverseGroups(binascii.a2b_base64(_reverseGroups(s[:full], 4)), 3)
+        if flush and (full != len(s)):
+            value = 0
+            for (i, c) in enumerate(s[full:]):
+                value |= MTB64Index[c] << (6 * i)
+            ret += (value & ((1 << (8 * (len(s) - full - 1))) - 1)).to_bytes(len(s) - full - 1, 'little')
+        return ret, s[full:]
+
+    def update(self, s):
+        if isinstance(s, str):
+            s = s.encode('ascii')
+        s = bytes(s).translate(None, MTB64Whitespace)
+        if s.translate(None, MTB64Chars + MTB64Pad):
+            raise ValueError("Invalid MTBase64 character")
+
+        ret = bytearray()
+        groups = s.split(MTB64Pad)
+        for (i, group) in enumerate(groups):
+            flush = i != len(groups) - 1
+            (value, self.pending) = self._decodeGroups(self.pending + group, flush)
+            ret += value
+            if flush:
+                self.pending = b''
+        return bytes(ret)
+
+    def final(self):
+        (ret, pending) = self._decodeGroups(self.pending, True)
+        self.pending = b''
+        return bytes(ret)
 
 def MTBse64Decode(s):
-    b64s = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
-    b64p = "="
-    ret = b""
-    s2 = str.encode(s.replace(b64p, ""))
-    left = 0
-    for i in range(0, len(s2)):
-        if left == 0:
-            left = 6
-        else:
-            value1 = b64s.index(s2[i - 1]) >> (6 - left)
-            value2 = b64s.index(s2[i]) & (2 ** (8 - left) - 1)
-            value = value1 | (value2 << left)
-            ret += bytes([value])
-            left -= 2
-    return ret
+    decoder = MTBse64Decoder()
+    return decoder.update(s) + decoder.final()
 
 # rotate n left by d bits
 def rotl(n, d):
@@ -122,11 +162,7 @@ def MT_Transform(s):
         s[(i+3) % 4] = to32bits(s[(i+3) % 4] - s[(i+1) % 4] - SHA256_K[i*4+3])
         s[(i+0) % 4] = to32bits((rotl(s[(i+3) % 4], SHA256_K[i*4+3] & 0x0F) ^ s[(i+0) % 4]) + s[(i+3) % 4])
 
-    ret = b''
-    for x in s:
-      ret += x.to_bytes(4, 'big')
-
-    return ret
+    return struct.pack('>'+'I'*len(s), *s)
 
 def MT_TransformRev(s):
     s = list(struct.unpack('>'+'I'*(len(s) // 4), s))
@@ -143,14 +179,121 @@ def MT_TransformRev(s):
         s[(i+3) % 4] = to32bits(rotl(s[(i+0) % 4], SHA256_K[i*4+0] & 0x0F) ^ (s[(i+3) % 4] - s[(i+0) % 4]))
         s[(i+2) % 4] = to32bits(s[(i+2) % 4] + s[(i+0) % 4] + SHA256_K[i*4+0])
 
-    ret = b''
-    for x in s:
-      ret += x.to_bytes(4, 'big')
+    return struct.pack('>'+'I'*len(s), *s)
 
-    return ret
+def _rotl_u32(n, d):
+    if d == 0:
+        return n
+    return (n << numpy.uint32(d)) | (n >> numpy.uint32(32 - d))
+
+def _MT_TransformBlocks(blocks):
+    # Returns blocks as (N, 4) uint32 array, given as bytes or array
+    if isinstance(blocks, numpy.ndarray):
+        return blocks.astype(numpy.uint32).reshape(-1, 4)
+    return numpy.frombuffer(bytes(blocks), dtype='>u4').astype(numpy.uint32).reshape(-1, 4)
+
+def MT_Transform_many(blocks):
+    """MT_Transform() of N 16 byte blocks, given either as bytes of length
+    16 * N or as a NumPy (N, 4) uint32 array. Returns the transformed blocks as
+    one bytes object. With NumPy available, the rounds are applied to all
+    blocks at once."""
+    if numpy is None:
+        blocks = bytes(blocks)
+        return b''.join(MT_Transform(blocks[i:i+16]) for i in range(0, len(blocks), 16))
 
-def MT_Hash(data):
-    return bytearray(MT_SHA256(data).digest())
+    blocks = _MT_TransformBlocks(blocks)
+    s = [blocks[:, i] for i in range(4)]
+    k = [numpy.uint32(x) for x in SHA256_K]
+    for i in range(16):
+        s[(i+2) % 4] = s[(i+2) % 4] - s[(i+0) % 4] - k[i*4+0]
+        s[(i+3) % 4] = (_rotl_u32(s[(i+0) % 4], SHA256_K[i*4+0] & 0x0F) ^ s[(i+3) % 4]) + s[(i+0) % 4]
+
+        s[(i+1) % 4] = s[(i+1) % 4] - s[(i+3) % 4] - k[i*4+1]
+        s[(i+2) % 4] = (_rotl_u32(s[(i+1) % 4], SHA256_K[i*4+1] & 0x0F) ^ s[(i+2) % 4]) + s[(i+1) % 4]
+
+        s[(i+0) % 4] = s[(i+0) % 4] - s[(i+2) % 4] - k[i*4+2]
+        s[(i+1) % 4] = (_rotl_u32(s[(i+2) % 4], SHA256_K[i*4+2] & 0x0F) ^ s[(i+1) % 4]) + s[(i+2) % 4]
+
+        s[(i+3) % 4] = s[(i+3) % 4] - s[(i+1) % 4] - k[i*4+3]
+        s[(i+0) % 4] = (_rotl_u32(s[(i+3) % 4], SHA256_K[i*4+3] & 0x0F) ^ s[(i+0) % 4]) + s[(i+3) % 4]
+
+    return numpy.stack(s, axis=1).astype('>u4').tobytes()
+
+def MT_TransformRev_many(blocks):
+    """MT_TransformRev() of N 16 byte blocks, see MT_Transform_many()."""
+    if numpy is None:
+        blocks = bytes(blocks)
+        return b''.join(MT_TransformRev(blocks[i:i+16]) for i in range(0, len(blocks), 16))
+
+    blocks = _MT_TransformBlocks(blocks)
+    s = [blocks[:, i] for i in range(4)]
+    k = [numpy.uint32(x) for x in SHA256_K]
+    for i in reversed(range(16)):
+        s[(i+0) % 4] = _rotl_u32(s[(i+3) % 4], SHA256_K[i*4+3] & 0x0F) ^ (s[(i+0) % 4] - s[(i+3) % 4])
+        s[(i+3) % 4] = s[(i+3) % 4] + s[(i+1) % 4] + k[i*4+3]
+
+        s[(i+1) % 4] = _rotl_u32(s[(i+2) % 4], SHA256_K[i*4+2] & 0x0F) ^ (s[(i+1) % 4] - s[(i+2) % 4])
+        s[(i+0) % 4] = s[(i+0) % 4] + s[(i+2) % 4] + k[i*4+2]
+
+        s[(i+2) % 4] = _rotl_u32(s[(i+1) % 4], SHA256_K[i*4+1] & 0x0F) ^ (s[(i+2) % 4] - s[(i+1) % 4])
+        s[(i+1) % 4] = s[(i+1) % 4] + s[(i+3) % 4] + k[i*4+1]
+
+        s[(i+3) % 4] = _rotl_u32(s[(i+0) % 4], SHA256_K[i*4+0] & 0x0F) ^ (s[(i+3) % 4] - s[(i+0) % 4])
+        s[(i+2) % 4] = s[(i+2) % 4] + s[(i+0) % 4] + k[i*4+0]
+
+    return numpy.stack(s, axis=1).astype('>u4').tobytes()
+
+def MT_Hash(data, hashclass = MT_FastSHA256):
+    return bytearray(hashclass(data).digest())
+
+def _rotr_u32(x, d):
+    return (x >> numpy.uint32(d)) | (x << numpy.uint32(32 - d))
+
+def _MT_Hash_lanes(blocks):
+    # blocks is an (N, B, 16) uint32 array, all N messages have B padded blocks
+    state = [numpy.full(blocks.shape[0], v, dtype=numpy.uint32) for v in SHA256_I]
+    k = numpy.array(SHA256_K, dtype=numpy.uint32)
+    for block in range(blocks.shape[1]):
+        w = [blocks[:, block, i] for i in range(16)]
+        for i in range(16, 64):
+            x = w[i - 15]
+            y = w[i - 2]
+            s0 = _rotr_u32(x, 7) ^ _rotr_u32(x, 18) ^ (x >> numpy.uint32(3))
+            s1 = _rotr_u32(y, 17) ^ _rotr_u32(y, 19) ^ (y >> numpy.uint32(10))
+            w.append(w[i - 16] + s0 + w[i - 7] + s1)
+
+        a, b, c, d, e, f, g, h = state
+        for i in range(64):
+            t1 = h + (_rotr_u32(e, 6) ^ _rotr_u32(e, 11) ^ _rotr_u32(e, 25)) + ((e & f) ^ (~e & g)) + k[i] + w[i]
+            t2 = (_rotr_u32(a, 2) ^ _rotr_u32(a, 13) ^ _rotr_u32(a, 22)) + ((a & b) ^ (a & c) ^ (b & c))
+            h, g, f, e, d, c, b, a = g, f, e, d + t1, c, b, a, t1 + t2
+        state = [s + v for (s, v) in zip(state, (a, b, c, d, e, f, g, h))]
+    return numpy.stack(state, axis=1).astype('>u4').tobytes()
+
+def _MT_pad(m):
+    tail = len(m) % 64
+    return b''.join([m[:len(m) - tail]] + MT_SHA256._pad_message(m[len(m) - tail:], len(m) * 8))
+
+def MT_Hash_many(messages):
+    """Returns MT_Hash() of every message in a list. With NumPy available,
+    messages with the same number of padded blocks are hashed together, one
+    uint32 lane per message."""
+    messages = [bytes(m) for m in messages]
+    if numpy is None:
+        return [MT_Hash(m) for m in messages]
+
+    groups = {}
+    for (index, m) in enumerate(messages):
+        groups.setdefault(len(m) // 64 + (len(m) % 64 > 55) + 1, []).append(index)
+
+    ret = [None] * len(messages)
+    for (blockcnt, indices) in groups.items():
+        data = b''.join(_MT_pad(messages[i]) for i in indices)
+        blocks = numpy.frombuffer(data, dtype='>u4').astype(numpy.uint32).reshape(len(indices), blockcnt, 16)
+        digests = _MT_Hash_lanes(blocks)
+        for (j, i) in enumerate(indices):
+            ret[i] = bytearray(digests[j * 32 : (j + 1) * 32])
+    return ret
 
 def MT_SWSNToSWID(s):
     ret = ""
@@ -1,107 +1,305 @@
 #!/usr/bin/python3
 
 import sys
-import struct
+import collections
 import binascii
-import array
+import multiprocessing
+import itertools
 
 from ecc import AffineCurvePoint, getcurvebyname, FieldElement
+from ecc.Tools import LRUCache
 
 from MTTools import *
 
-if len(sys.argv) != 2:
-    print(sys.argv[0]+" <license file>")
-    exit()
+LIC_BEGIN = '-----BEGIN MIKROTIK SOFTWARE KEY'
+LIC_END   = '-----END MIKROTIK SOFTWARE KEY'
 
-with open(sys.argv[1], "r") as licFile:
-    lic=licFile.read().split('\n')
+# Mikrotik public key (curve25519 x coordinate, little endian)
+MT_PUBKEY = "8E1067E4305FCDC0CFBF95C10F96E5DFE8C49AEF486BD1A4E2E96C27F01E3E32"
+MT_CURVE = "curve25519"
 
-if lic[0] != '-----BEGIN MIKROTIK SOFTWARE KEY------------' or \
-   lic[3] != '-----END MIKROTIK SOFTWARE KEY--------------':
-    print('Not a Mikrotik license file')
-    exit()
+LicenseBlock = collections.namedtuple('LicenseBlock', [ 'offset', 'length', 'license' ])
+LicenseResult = collections.namedtuple('LicenseResult', [ 'swid', 'swsn', 'level', 'hash', 'valid', 'error' ], defaults = (None, ))
 
-lic = lic[1]+lic[2]
-# MTBase64 decode license
-lic = MTBse64Decode(lic)
+class LicenseFormatError(Exception):
+    pass
 
-print("-- MTBase64 decoded")
-printBytes(lic)
-print()
+def stripLicense(lic):
+    """Returns the MTBase64 payload of a license, given either as the whole
+    license file text (with BEGIN/END lines), as the bare payload or as a
+    LicenseBlock."""
+    if isinstance(lic, LicenseBlock):
+        return lic.license
+    if isinstance(lic, (bytes, bytearray)):
+        lic = lic.decode('ascii')
+    begin = lic.find(LIC_BEGIN)
+    if begin != -1:
+        begin = lic.find('\n', begin)
+        end = lic.find(LIC_END, begin)
+        if (begin == -1) or (end == -1):
+            raise LicenseFormatError('Not a Mikrotik license file')
+        lic = lic[begin:end]
+    return ''.join(lic.split())
 
-# MT_Transform license value
-licVal = MT_Transform(lic[:16])
+def scan_licenses(f, chunksize = 65536, maxlength = 4096):
+    """Reads a file object in chunks and yields a LicenseBlock (byte offset
+    and length of the whole block, MTBase64 payload) for every MIKROTIK
+    SOFTWARE KEY block found in it. Blocks may be embedded in arbitrary other
+    data and use any line endings. A BEGIN line without END line within
+    maxlength bytes is skipped, so memory use is bounded by chunksize and
+    maxlength regardless of the file size."""
+    begin = LIC_BEGIN.encode('ascii')
+    end = LIC_END.encode('ascii')
+    buf = b''
+    start = 0
+    base = 0
+    eof = False
+    while True:
+        # Scanning continues at buf[start:], buf[0] is at file offset base
+        pos = buf.find(begin, start)
+        if pos != -1:
+            endpos = buf.find(end, pos + len(begin))
+            if endpos != -1:
+                # Start over at the last BEGIN line before the END line
+                pos = buf.rfind(begin, pos, endpos)
+                stop = endpos + len(end)
+                while (stop < len(buf)) and (buf[stop] == ord('-')):
+                    stop += 1
+                if (len(buf) - stop >= len(begin)) or eof:
+                    # Dashes of a directly following BEGIN line are not part of this block
+                    if buf.startswith(begin.lstrip(b'-'), stop):
+                        stop = max(stop - (len(begin) - len(begin.lstrip(b'-'))), endpos + len(end))
+                    lic = b''.join(buf[pos + len(begin) : endpos].lstrip(b'-').split())
+                    yield LicenseBlock(offset = base + pos, length = stop - pos, license = lic.decode('latin-1'))
+                    start = stop
+                    continue
+            elif len(buf) - pos > maxlength:
+                # No END line, skip this BEGIN line
+                start = pos + 1
+                continue
+        elif len(buf) - start >= len(begin):
+            # Keep what could be the start of a BEGIN line
+            start = len(buf) - len(begin) + 1
 
-print("-- Transformed license")
-printBytes(licVal)
-print()
+        if eof:
+            break
+        chunk = f.read(chunksize)
+        if isinstance(chunk, str):
+            chunk = chunk.encode('latin-1')
+        if not chunk:
+            eof = True
+        # Drop the scanned data once per chunk instead of once per block
+        buf = buf[start:] + chunk
+        base += start
+        start = 0
 
-# Software ID
-SWID = int.from_bytes(licVal[:6], 'little')
-print("-- Software ID")
-print(hex(SWID))
-print(MT_SWSNToSWID(SWID))
-print()
+def scan_license_file(filename, chunksize = 65536):
+    """Yields a LicenseBlock for every license in the named file, see
+    scan_licenses(). The filename '-' reads standard input."""
+    if filename == '-':
+        yield from scan_licenses(sys.stdin.buffer, chunksize)
+    else:
+        with open(filename, 'rb') as f:
+            yield from scan_licenses(f, chunksize)
 
-# License level
-print("-- License level")
-print(licVal[7])
-print()
+# Decompressed public key points by (encoded public key, curve name)
+_pubkeyCache = LRUCache(16)
 
-# Signature verification
-hash = MT_Hash(licVal)
+def decodePubkey(pubkey, curve):
+    """Returns the curve point of a public key given as little endian hex x
+    coordinate on a Montgomery curve, or None if it is not on the curve."""
+    pub = int.from_bytes(binascii.a2b_hex(pubkey), 'little')
+    x = FieldElement(pub, curve.p)
+    pub_y = (x * (x * (x + curve.a) + 1)).sqrt()
+    if pub_y is None:
+        return None
+    return AffineCurvePoint(pub, int(pub_y[0]), curve)
 
-print("-- License hash")
-printBytes(hash)
-print()
+class LicenseVerifier(object):
+    """Verifies Mikrotik software keys. The curve and the public key point are
+    set up once on construction, so one verifier should be reused for checking
+    any number of licenses. Decoded public key points are also cached across
+    verifiers."""
 
-for i in range(16):
-  hash[8+i] = hash[8+i] ^ lic[16+i]
+    def __init__(self, pubkey = MT_PUBKEY, curvename = MT_CURVE):
+        self.pubkey = pubkey
+        self.curvename = curvename
+        self.curve = getcurvebyname(curvename)
 
-hash[31] = (hash[31] & 0x7F) | 0x40;
-hash[ 0] =  hash[ 0] & 0xF8;
+        # Py of public key to Px
+        key = (pubkey.upper(), curvename)
+        self.pub = _pubkeyCache.get(key)
+        if self.pub is None:
+            self.pub = decodePubkey(pubkey, self.curve)
+            if self.pub is None:
+                raise ValueError('Public key is not on ' + curvename)
+            _pubkeyCache.put(key, self.pub)
 
-print("-- Modified license hash")
-printBytes(hash)
-print()
+    def verify(self, lic, trace = None):
+        """Verifies a single license and returns a LicenseResult. If a trace
+        callable is given, it is called as trace(title, *values) with every
+        intermediate value of the computation. Malformed licenses raise
+        LicenseFormatError."""
+        if trace is None:
+            trace = lambda title, *values: None
 
-sig = lic[32:64]
-print("-- License signature (from License)")
-printBytes(sig)
-print()
+        # MTBase64 decode license
+        try:
+            lic = MTBse64Decode(stripLicense(lic))
+        except ValueError as e:
+            raise LicenseFormatError(str(e)) from e
+        if len(lic) < 64:
+            raise LicenseFormatError('License too short (%d bytes)' % len(lic))
+        trace("MTBase64 decoded", lic)
 
-curve = getcurvebyname("curve25519")
+        # MT_Transform license value
+        licVal = MT_Transform(lic[:16])
+        trace("Transformed license", licVal)
 
-pub="8E1067E4305FCDC0CFBF95C10F96E5DFE8C49AEF486BD1A4E2E96C27F01E3E32"
+        # Software ID
+        swsn = int.from_bytes(licVal[:6], 'little')
+        swid = MT_SWSNToSWID(swsn)
+        trace("Software ID", hex(swsn), swid)
 
-pub=binascii.b2a_hex(binascii.a2b_hex(pub)[::-1])
-pub=int(pub, 16)
+        # License level
+        level = licVal[7]
+        trace("License level", level)
 
-hash = int.from_bytes(hash, 'little')
-sig  = int.from_bytes(sig,  'little')
+        # Signature verification
+        licHash = MT_Hash(licVal)
+        trace("License hash", licHash)
 
-# Py of public key to Px
-pub=AffineCurvePoint(pub, int(FieldElement(pub**3+int(curve.a)*pub**2+pub, curve.p).sqrt()[0]), curve)
+        hash = bytearray(licHash)
+        for i in range(16):
+            hash[8+i] = hash[8+i] ^ lic[16+i]
 
-Y=int((pub*sig + curve.G*hash).x)
-Y=Y.to_bytes(32, byteorder='little')
+        hash[31] = (hash[31] & 0x7F) | 0x40
+        hash[ 0] =  hash[ 0] & 0xF8
+        trace("Modified license hash", hash)
 
-print("-- Elliptic curve computation result")
-print("   Y = signature * PubKey + hash * G")
-printBytes(Y)
-print()
+        sig = lic[32:64]
+        trace("License signature (from License)", sig)
 
-Yhash = MT_Hash(Y)
+        hash = int.from_bytes(hash, 'little')
+        sig  = int.from_bytes(sig,  'little')
 
-print("-- MT_Hash of elliptic curve result")
-printBytes(Yhash)
-print()
+        # Y = pub*sig + G*hash, x only (the neutral element counts as 0)
+        Y = self.curve.xonly_double_scalar_mul(sig, self.pub, hash, self.curve.G) or 0
+        Y = Y.to_bytes(32, byteorder='little')
+        trace("Elliptic curve computation result", "   Y = signature * PubKey + hash * G", Y)
 
-print("-- Compare computation result with License")
-printBytes(Yhash[:16])
-printBytes(lic[16:32])
-print("-- Compare result")
-if Yhash[:16] == lic[16:32]:
-    print('OK - License valid')
-else:
-    print('Failed')
+        Yhash = MT_Hash(Y)
+        trace("MT_Hash of elliptic curve result", Yhash)
+
+        trace("Compare computation result with License", Yhash[:16], lic[16:32])
+        return LicenseResult(swid = swid, swsn = swsn, level = level, hash = bytes(licHash), valid = (Yhash[:16] == lic[16:32]))
+
+# Verifier of a worker process, set up once by the pool initializer
+_workerVerifier = None
+
+def _initWorker(pubkey, curvename):
+    global _workerVerifier
+    _workerVerifier = LicenseVerifier(pubkey, curvename)
+
+def _verifyOne(verifier, lic):
+    try:
+        return verifier.verify(lic)
+    except LicenseFormatError as e:
+        return LicenseResult(swid = None, swsn = None, level = None, hash = None, valid = False, error = e)
+
+def _verifyWorker(item):
+    (key, lic) = item
+    return (key, _verifyOne(_workerVerifier, lic))
+
+def verify_licenses(licenses, verifier = None, processes = 1, chunksize = 16):
+    """Verifies every license of an iterable and yields a LicenseResult for
+    each of them, in input order. Licenses may be given as whole license file
+    texts or as bare MTBase64 payloads. A malformed license does not stop the
+    iteration, it yields an invalid result with the LicenseFormatError set as
+    error. See verify_keyed_licenses() for the meaning of processes and
+    chunksize."""
+    items = ((None, lic) for lic in licenses)
+    for (key, result) in verify_keyed_licenses(items, verifier, processes, chunksize):
+        yield result
+
+def verify_keyed_licenses(items, verifier = None, processes = 1, chunksize = 16):
+    """Like verify_licenses(), but takes (key, license) pairs and yields
+    (key, LicenseResult) pairs, in input order. The keys are passed through
+    unchanged and have to be picklable.
+
+    With processes other than 1 the licenses are distributed in chunks of
+    chunksize over a pool of worker processes (processes = None uses all
+    CPUs). Every worker sets up its own verifier once on startup. The input
+    is read in windows of a few chunks per worker and at most two windows
+    are in flight, so a lazy input is only consumed as fast as results are
+    taken and memory use does not grow with the number of licenses."""
+    if processes == 1:
+        if verifier is None:
+            verifier = LicenseVerifier()
+        for (key, lic) in items:
+            yield (key, _verifyOne(verifier, lic))
+        return
+
+    # The workers set up their own verifiers, none is needed in this process
+    if verifier is None:
+        initargs = (MT_PUBKEY, MT_CURVE)
+    else:
+        initargs = (verifier.pubkey, verifier.curvename)
+    items = iter(items)
+    window = 4 * chunksize * (processes or multiprocessing.cpu_count())
+    with multiprocessing.Pool(processes, initializer = _initWorker, initargs = initargs) as pool:
+        pending = collections.deque()
+        while True:
+            batch = list(itertools.islice(items, window))
+            if batch:
+                pending.append(pool.imap(_verifyWorker, batch, chunksize))
+            if (len(pending) > 1) or (pending and not batch):
+                yield from pending.popleft()
+            if not pending:
+                break
+
+def printTrace(title, *values):
+    print("-- " + title)
+    for value in values:
+        if isinstance(value, (bytes, bytearray)):
+            printBytes(value)
+        else:
+            print(value)
+    print()
+
+def main(argv):
+    if len(argv) < 2:
+        print(argv[0]+" <license file> [<license file> ...]")
+        return 1
+
+    blocks = ((filename, block) for filename in argv[1:] for block in scan_license_file(filename))
+    first = list(itertools.islice(blocks, 2))
+    if len(first) == 0:
+        print('Not a Mikrotik license file')
+        return 1
+
+    if len(first) > 1:
+        # Batch mode, verify all licenses of all files on all CPUs
+        items = (((filename, block.offset), block) for (filename, block) in itertools.chain(first, blocks))
+        for ((filename, offset), result) in verify_keyed_licenses(items, processes = None):
+            if result.error is not None:
+                print("%s:%d: Not a Mikrotik license (%s)" % (filename, offset, result.error))
+            else:
+                print("%s:%d: %s level %d %s" % (filename, offset, result.swid, result.level, "OK" if result.valid else "Failed"))
+        return 0
+
+    try:
+        result = LicenseVerifier().verify(first[0][1], trace = printTrace)
+    except LicenseFormatError:
+        print('Not a Mikrotik license file')
+        return 1
+
+    print("-- Compare result")
+    if result.valid:
+        print('OK - License valid')
+    else:
+        print('Failed')
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
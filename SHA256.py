@@ -46,6 +46,9 @@ class SHA256(object):
     # Container for the state registers between rounds:
     State = collections.namedtuple('State', 'a b c d e f g h')
 
+    # Container for the digest state after a number of complete blocks:
+    Midstate = collections.namedtuple('Midstate', 'state length round_offset')
+
     # From FIPS 180-3 section 5.3.3 (page 15):
     INITIAL_STATE = State(
         0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a,
@@ -287,12 +290,72 @@ class SHA256(object):
 
         message = bytes(message)
         self.length += len(message) * 8
-        self.buffer = b''.join((self.buffer, message))
+        if self.buffer:
+            message = b''.join((self.buffer, message))
 
-        while len(self.buffer) >= 64:
-            self.state = self._process_block(self.buffer[:64], self.state, self.round_offset)
-            self.buffer = self.buffer[64:]
+        end = len(message) - len(message) % 64
+        for offset in range(0, end, 64):
+            self.state = self._process_block(message[offset:offset + 64], self.state, self.round_offset)
             self.round_offset += 64
+        self.buffer = message[end:]
+
+    @classmethod
+    def from_midstate(cls, state, length, round_offset=0):
+        """
+        Creates a hash object which resumes hashing from a midstate previously
+        returned by midstate(), i.e. as if the complete blocks that led up to
+        that midstate had been passed to update() again.
+
+        :param state:
+            The digest state after the last complete block.
+
+        :param length:
+            Length of the data hashed so far, in bits.  Must be a multiple of
+            the block size (512 bits).
+
+        :param round_offset:
+            The number of rounds performed so far.
+
+        """
+
+        assert not length % 512, 'from_midstate() length must be a multiple of 512 bits'
+
+        obj = cls.__new__(cls)
+        obj.state = cls.State(*state)
+        obj.length = long(length)
+        obj.buffer = b''
+        obj.round_offset = round_offset
+        return obj
+
+    def midstate(self):
+        """
+        Returns the digest state after the last complete block as a Midstate
+        tuple (state, length, round_offset), which can be passed to
+        from_midstate().  Data of an incomplete block that is still buffered
+        is not part of the midstate.
+
+        """
+
+        return self.Midstate(
+            state=self.state,
+            length=self.length - len(self.buffer) * 8,
+            round_offset=self.round_offset
+        )
+
+    def copy(self):
+        """
+        Returns a copy of the hash object, including buffered data.  Hashing
+        many messages with a common prefix only has to digest the prefix once
+        when each message continues from a copy of the prefix's hash object.
+
+        """
+
+        obj = self.__class__.__new__(self.__class__)
+        obj.state = self.state
+        obj.length = self.length
+        obj.buffer = self.buffer
+        obj.round_offset = self.round_offset
+        return obj
 
     def digest(self):
         """
@@ -315,3 +378,58 @@ class SHA256(object):
         """Like digest(), but returns a hexadecimal string."""
 
         return binascii.hexlify(self.digest())
+
+
+class FastSHA256(SHA256):
+    """
+    SHA256 with an optimized compression function.
+
+    The message schedule and all 64 rounds of a block are computed with plain
+    local variables instead of going through State tuples and the abstract
+    bitwise operations above, so overriding those operations (or _round()) has
+    no effect on this class.  The K and INITIAL_STATE constants are still
+    looked up on the class and may be overridden.
+
+    """
+
+    @classmethod
+    def _process_block(cls, message, state=SHA256.INITIAL_STATE, round_offset=0):
+        """
+        Processes a block of message data, returning the new digest state.
+        Works exactly like SHA256._process_block().
+
+        """
+
+        assert len(message) == 64, '_process_block() got %d bytes, expected 64' % len(message)
+
+        w = list(struct.unpack('>LLLLLLLLLLLLLLLL', message))
+        for i in range(16, 64):
+            x = w[i - 15]
+            y = w[i - 2]
+            s0 = ((x >> 7 | x << 25) ^ (x >> 18 | x << 14) ^ (x >> 3)) & 0xffffffff
+            s1 = ((y >> 17 | y << 15) ^ (y >> 19 | y << 13) ^ (y >> 10)) & 0xffffffff
+            w.append((w[i - 16] + s0 + w[i - 7] + s1) & 0xffffffff)
+
+        a, b, c, d, e, f, g, h = state
+        for k, wi in zip(cls.K, w):
+            t1 = h + ((e >> 6 | e << 26) ^ (e >> 11 | e << 21) ^ (e >> 25 | e << 7)) + ((e & f) ^ (~e & g)) + k + wi
+            t2 = ((a >> 2 | a << 30) ^ (a >> 13 | a << 19) ^ (a >> 22 | a << 10)) + ((a & b) ^ (a & c) ^ (b & c))
+            h = g
+            g = f
+            f = e
+            e = (d + t1) & 0xffffffff
+            d = c
+            c = b
+            b = a
+            a = (t1 + t2) & 0xffffffff
+
+        return cls.State(
+            (state[0] + a) & 0xffffffff,
+            (state[1] + b) & 0xffffffff,
+            (state[2] + c) & 0xffffffff,
+            (state[3] + d) & 0xffffffff,
+            (state[4] + e) & 0xffffffff,
+            (state[5] + f) & 0xffffffff,
+            (state[6] + g) & 0xffffffff,
+            (state[7] + h) & 0xffffffff
+        )
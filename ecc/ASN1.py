@@ -21,169 +21,235 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 #
 
-try:
-	from pyasn1.type import univ, namedtype, tag
-	import pyasn1.codec.ber.decoder
-
-	class ECPVer(univ.Integer):
-		"""RFC 3279:  Algorithms and Identifiers for the Internet X.509 Public Key Infrastructure Certificate and Certificate Revocation List (CRL) Profile
-
-		ECPVer ::= INTEGER {ecpVer1(1)}
-		"""
-		pass
-
-	class FieldElement(univ.OctetString):
-		"""RFC 3279:  Algorithms and Identifiers for the Internet X.509 Public Key Infrastructure Certificate and Certificate Revocation List (CRL) Profile
-
-		FieldElement ::= OCTET STRING
-		"""
-		pass
-
-	class ECPoint(univ.OctetString):
-		"""RFC 3279:  Algorithms and Identifiers for the Internet X.509 Public Key Infrastructure Certificate and Certificate Revocation List (CRL) Profile
-
-		ECPoint ::= OCTET STRING
-		"""
-		pass
-
-	class Curve(univ.Sequence):
-		"""RFC 3279:  Algorithms and Identifiers for the Internet X.509 Public Key Infrastructure Certificate and Certificate Revocation List (CRL) Profile
-
-		Curve ::= SEQUENCE {
-			a         FieldElement,
-			b         FieldElement,
-			seed      BIT STRING OPTIONAL
-		}
-		"""
-		componentType = namedtype.NamedTypes(
-			namedtype.NamedType("a", FieldElement()),
-			namedtype.NamedType("b", FieldElement()),
-			namedtype.OptionalNamedType("seed", univ.BitString()),
-		)
-
-	class FieldID(univ.Sequence):
-		"""RFC 3279:  Algorithms and Identifiers for the Internet X.509 Public Key Infrastructure Certificate and Certificate Revocation List (CRL) Profile
-
-		FieldID ::= SEQUENCE {
-			fieldType   OBJECT IDENTIFIER,
-			parameters  ANY DEFINED BY fieldType
-		}
-		"""
-		componentType = namedtype.NamedTypes(
-			namedtype.NamedType("fieldType", univ.ObjectIdentifier()),
-			namedtype.NamedType("parameters", univ.Any()),
-		)
-
-	class SpecifiedECDomain(univ.Sequence):
-		"""RFC 3279:  Algorithms and Identifiers for the Internet X.509 Public Key Infrastructure Certificate and Certificate Revocation List (CRL) Profile
-
-		ECParameters ::= SEQUENCE {
-			version   ECPVer,          -- version is always 1
-			fieldID   FieldID,         -- identifies the finite field over which the curve is defined
-			curve     Curve,           -- coefficients a and b of the elliptic curve
-			base      ECPoint,         -- specifies the base point P on the elliptic curve
-			order     INTEGER,         -- the order n of the base point
-			cofactor  INTEGER OPTIONAL -- The integer h = #E(Fq)/n
-		}
-		"""
-		componentType = namedtype.NamedTypes(
-			namedtype.NamedType("version", ECPVer()),
-			namedtype.NamedType("fieldID", FieldID()),
-			namedtype.NamedType("curve", Curve()),
-			namedtype.NamedType("base", ECPoint()),
-			namedtype.NamedType("order", univ.Integer()),
-			namedtype.OptionalNamedType("cofactor", univ.Integer()),
-		)
-
-	class ECParameters(univ.Choice):
-		"""RFC 5480: Elliptic Curve Cryptography Subject Public Key Information
-
-		ECParameters ::= CHOICE {
-			namedCurve      OBJECT IDENTIFIER
-			implicitCurve   NULL
-			specifiedCurve  SpecifiedECDomain
-		 }
-		"""
-		componentType = namedtype.NamedTypes(
-			namedtype.NamedType("namedCurve", univ.ObjectIdentifier()),
-			namedtype.NamedType("implicitCurve", univ.Null()),
-			namedtype.NamedType("specifiedCurve", SpecifiedECDomain()),
-		)
-
-
-	class ECPrivateKey(univ.Sequence):
-		"""RFC 5915: Elliptic Curve Private Key Structure
-
-		ECPrivateKey ::= SEQUENCE {
-			version        INTEGER { ecPrivkeyVer1(1) } (ecPrivkeyVer1),
-			privateKey     OCTET STRING,
-			parameters [0] ECParameters {{ NamedCurve }} OPTIONAL,
-			publicKey  [1] BIT STRING OPTIONAL
-		}
-		"""
-		componentType = namedtype.NamedTypes(
-			namedtype.NamedType("version", univ.Integer()),
-			namedtype.NamedType("privateKey", univ.OctetString()),
-			namedtype.OptionalNamedType("parameters", ECParameters().subtype(implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0))),
-			namedtype.OptionalNamedType("publicKey", univ.BitString().subtype(implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 1))),
-		)
-
-	class AlgorithmIdentifier(univ.Sequence):
-		"""RFC 5480: Elliptic Curve Cryptography Subject Public Key Information
-
-		AlgorithmIdentifier  ::=  SEQUENCE  {
-			algorithm   OBJECT IDENTIFIER,
-			parameters  ANY DEFINED BY algorithm OPTIONAL
+from . import Tools
+
+# Keys are decoded by a small DER parser which only knows the fixed structures
+# of RFC 5915 ECPrivateKey and RFC 5480 SubjectPublicKeyInfo. It works on
+# memoryview slices of the input and only copies the leaf values. Encodings
+# it does not handle (e.g. BER indefinite lengths) are passed on to the
+# general pyasn1 decoder, which is only imported then. Both return the same
+# structure of dictionaries, with OIDs as str, INTEGERs as int and OCTET and
+# BIT STRINGs as bytes:
+#
+#	ECParameters:		{ "namedCurve": str or None, "implicitCurve": bool, "specifiedCurve": dict or None }
+#	SpecifiedECDomain:	{ "version": int, "fieldID": { "fieldType": str, "parameters": bytes (DER) },
+#						  "curve": { "a": bytes, "b": bytes, "seed": bytes or None },
+#						  "base": bytes, "order": int, "cofactor": int or None }
+
+_TAG_INTEGER = 0x02
+_TAG_BIT_STRING = 0x03
+_TAG_OCTET_STRING = 0x04
+_TAG_NULL = 0x05
+_TAG_OID = 0x06
+_TAG_SEQUENCE = 0x30
+_TAG_CONTEXT_0 = 0xa0
+_TAG_CONTEXT_1 = 0xa1
+
+class _DERFallback(Exception):
+	"""Raised when the DER parser cannot handle an encoding."""
+	pass
+
+def _der_tlv(data, offset, end):
+	"""Returns (tag, begin, start, stop) of the TLV at offset, where
+	data[begin : stop] is the whole TLV and data[start : stop] its content."""
+	if offset + 2 > end:
+		raise _DERFallback("Truncated TLV")
+	begin = offset
+	tag = data[offset]
+	if (tag & 0x1f) == 0x1f:
+		raise _DERFallback("High tag number")
+	length = data[offset + 1]
+	offset += 2
+	if length & 0x80:
+		count = length & 0x7f
+		if (count == 0) or (count > 4) or (offset + count > end):
+			raise _DERFallback("Indefinite or invalid length")
+		length = int.from_bytes(data[offset : offset + count], "big")
+		offset += count
+	if offset + length > end:
+		raise _DERFallback("Truncated content")
+	return (tag, begin, offset, offset + length)
+
+def _der_expect(tlv, tag):
+	if tlv[0] != tag:
+		raise _DERFallback("Expected tag 0x%x, found 0x%x" % (tag, tlv[0]))
+	return tlv
+
+def _der_children(data, tlv, tag, counts):
+	"""Returns the list of TLVs within a constructed value of the given tag,
+	the number of which has to be in counts."""
+	(tag, begin, start, stop) = _der_expect(tlv, tag)
+	children = [ ]
+	while start < stop:
+		child = _der_tlv(data, start, stop)
+		children.append(child)
+		start = child[3]
+	if len(children) not in counts:
+		raise _DERFallback("Unexpected number of elements")
+	return children
+
+def _der_int(data, tlv):
+	(tag, begin, start, stop) = _der_expect(tlv, _TAG_INTEGER)
+	return int.from_bytes(data[start : stop], "big", signed = True)
+
+def _der_octets(data, tlv):
+	(tag, begin, start, stop) = _der_expect(tlv, _TAG_OCTET_STRING)
+	return bytes(data[start : stop])
+
+def _der_bits(data, tlv):
+	(tag, begin, start, stop) = _der_expect(tlv, _TAG_BIT_STRING)
+	if (stop == start) or (data[start] != 0):
+		raise _DERFallback("Bit string length is not a multiple of 8")
+	return bytes(data[start + 1 : stop])
+
+def _der_oid(data, tlv):
+	(tag, begin, start, stop) = _der_expect(tlv, _TAG_OID)
+	arcs = [ ]
+	value = 0
+	for byte in data[start : stop]:
+		value = (value << 7) | (byte & 0x7f)
+		if not (byte & 0x80):
+			arcs.append(value)
+			value = 0
+	if (len(arcs) == 0) or (data[stop - 1] & 0x80):
+		raise _DERFallback("Invalid OID")
+	first = min(arcs[0] // 40, 2)
+	return ".".join(str(arc) for arc in [ first, arcs[0] - (40 * first) ] + arcs[1:])
+
+def _der_ecparameters(data, tlv):
+	result = { "namedCurve": None, "implicitCurve": False, "specifiedCurve": None }
+	if tlv[0] == _TAG_OID:
+		result["namedCurve"] = _der_oid(data, tlv)
+	elif tlv[0] == _TAG_NULL:
+		result["implicitCurve"] = True
+	else:
+		fields = _der_children(data, tlv, _TAG_SEQUENCE, (5, 6))
+		field_id = _der_children(data, fields[1], _TAG_SEQUENCE, (2, ))
+		curve = _der_children(data, fields[2], _TAG_SEQUENCE, (2, 3))
+		result["specifiedCurve"] = {
+			"version":		_der_int(data, fields[0]),
+			"fieldID": {
+				"fieldType":	_der_oid(data, field_id[0]),
+				"parameters":	bytes(data[field_id[1][1] : field_id[1][3]]),
+			},
+			"curve": {
+				"a":			_der_octets(data, curve[0]),
+				"b":			_der_octets(data, curve[1]),
+				"seed":			_der_bits(data, curve[2]) if (len(curve) == 3) else None,
+			},
+			"base":			_der_octets(data, fields[3]),
+			"order":		_der_int(data, fields[4]),
+			"cofactor":		_der_int(data, fields[5]) if (len(fields) == 6) else None,
 		}
-		"""
-		componentType = namedtype.NamedTypes(
-			namedtype.NamedType("algorithm", univ.ObjectIdentifier()),
-			namedtype.NamedType("parameters", ECParameters()),
-		)
-
-	class ECPublicKey(univ.Sequence):
-		"""RFC 5480: Elliptic Curve Cryptography Subject Public Key Information
-
-		SubjectPublicKeyInfo  ::=  SEQUENCE  {
-			algorithm         AlgorithmIdentifier,
-			subjectPublicKey  BIT STRING
+	return result
+
+def _der_public_key(derdata):
+	data = memoryview(derdata)
+	spki = _der_children(data, _der_tlv(data, 0, len(data)), _TAG_SEQUENCE, (2, ))
+	algorithm = _der_children(data, spki[0], _TAG_SEQUENCE, (2, ))
+	return {
+		"algorithm": {
+			"algorithm":	_der_oid(data, algorithm[0]),
+			"parameters":	_der_ecparameters(data, algorithm[1]),
+		},
+		"subjectPublicKey":	_der_bits(data, spki[1]),
+	}
+
+def _der_private_key(derdata):
+	data = memoryview(derdata)
+	fields = _der_children(data, _der_tlv(data, 0, len(data)), _TAG_SEQUENCE, (2, 3, 4))
+	result = {
+		"version":		_der_int(data, fields[0]),
+		"privateKey":	_der_octets(data, fields[1]),
+		"parameters":	None,
+		"publicKey":	None,
+	}
+	for field in fields[2:]:
+		if (field[0] == _TAG_CONTEXT_0) and (result["parameters"] is None) and (result["publicKey"] is None):
+			result["parameters"] = _der_ecparameters(data, _der_children(data, field, _TAG_CONTEXT_0, (1, ))[0])
+		elif (field[0] == _TAG_CONTEXT_1) and (result["publicKey"] is None):
+			result["publicKey"] = _der_bits(data, _der_children(data, field, _TAG_CONTEXT_1, (1, ))[0])
+		else:
+			raise _DERFallback("Unexpected ECPrivateKey element")
+	return result
+
+def _pyasn1_schema():
+	from . import ASN1Schema
+	if not ASN1Schema.have_pyasn1:
+		raise Exception("Key encoding requires general ASN.1 decoding, but the pyasn1 library could not be imported. Functionality not available.")
+	return ASN1Schema
+
+def _pyasn1_ecparameters(parsed):
+	result = { "namedCurve": None, "implicitCurve": False, "specifiedCurve": None }
+	if parsed["namedCurve"] is not None:
+		result["namedCurve"] = str(parsed["namedCurve"])
+	elif parsed["specifiedCurve"] is not None:
+		specified = parsed["specifiedCurve"]
+		result["specifiedCurve"] = {
+			"version":		int(specified["version"]),
+			"fieldID": {
+				"fieldType":	str(specified["fieldID"]["fieldType"]),
+				"parameters":	bytes(specified["fieldID"]["parameters"]),
+			},
+			"curve": {
+				"a":			bytes(specified["curve"]["a"]),
+				"b":			bytes(specified["curve"]["b"]),
+				"seed":			None if (specified["curve"]["seed"] is None) else Tools.bits_to_bytes(specified["curve"]["seed"]),
+			},
+			"base":			bytes(specified["base"]),
+			"order":		int(specified["order"]),
+			"cofactor":		None if (specified["cofactor"] is None) else int(specified["cofactor"]),
 		}
-		"""
-		componentType = namedtype.NamedTypes(
-			namedtype.NamedType("algorithm", AlgorithmIdentifier()),
-			namedtype.NamedType("subjectPublicKey", univ.BitString()),
-		)
-
-	class FieldFPParameters(univ.Integer):
-		"""For F_P fields, the field parameters is just the integer P."""
-		pass
-
-	__have_asn1 = True
-except ImportError:
-	__have_asn1 = False
+	else:
+		result["implicitCurve"] = True
+	return result
+
+def _pyasn1_public_key(derdata):
+	schema = _pyasn1_schema()
+	(parsed, tail) = schema.pyasn1.codec.ber.decoder.decode(bytes(derdata), asn1Spec = schema.EC_PUBLIC_KEY_SPEC)
+	return {
+		"algorithm": {
+			"algorithm":	str(parsed["algorithm"]["algorithm"]),
+			"parameters":	_pyasn1_ecparameters(parsed["algorithm"]["parameters"]),
+		},
+		"subjectPublicKey":	Tools.bits_to_bytes(parsed["subjectPublicKey"]),
+	}
+
+def _pyasn1_private_key(derdata):
+	schema = _pyasn1_schema()
+	(parsed, tail) = schema.pyasn1.codec.ber.decoder.decode(bytes(derdata), asn1Spec = schema.EC_PRIVATE_KEY_SPEC)
+	return {
+		"version":		int(parsed["version"]),
+		"privateKey":	bytes(parsed["privateKey"]),
+		"parameters":	None if (parsed["parameters"] is None) else _pyasn1_ecparameters(parsed["parameters"]),
+		"publicKey":	None if (parsed["publicKey"] is None) else Tools.bits_to_bytes(parsed["publicKey"]),
+	}
 
 def have_asn1_support():
-	return __have_asn1
-
-def __assert_asn1_support():
-	if not have_asn1_support():
-		raise Exception("ASN.1 support is required, but the pyasn1 library could not be imported. Functionality not available.")
+	"""Returns if ASN.1 encoded keys can be loaded. This is always the case
+	for DER encoded keys, pyasn1 is only required for other encodings."""
+	return True
 
 def parse_asn1_field_params_fp(derdata):
 	"""Parse an ASN.1 DER encoded field parameter for fields in F_P."""
-	__assert_asn1_support()
-	(parsed, tail) = pyasn1.codec.ber.decoder.decode(derdata, asn1Spec = FieldFPParameters())
-	return parsed
+	data = memoryview(derdata)
+	try:
+		return _der_int(data, _der_tlv(data, 0, len(data)))
+	except _DERFallback:
+		schema = _pyasn1_schema()
+		(parsed, tail) = schema.pyasn1.codec.ber.decoder.decode(bytes(derdata), asn1Spec = schema.FIELD_FP_PARAMETERS_SPEC)
+		return int(parsed)
 
 def parse_asn1_public_key(derdata):
 	"""Parse an ASN.1 DER encoded EC public key."""
-	__assert_asn1_support()
-	(parsed, tail) = pyasn1.codec.ber.decoder.decode(derdata, asn1Spec = ECPublicKey())
-	return parsed
+	try:
+		return _der_public_key(derdata)
+	except _DERFallback:
+		return _pyasn1_public_key(derdata)
 
 def parse_asn1_private_key(derdata):
 	"""Parse an ASN.1 DER encoded EC private key."""
-	__assert_asn1_support()
-	(parsed, tail) = pyasn1.codec.ber.decoder.decode(derdata, asn1Spec = ECPrivateKey())
-	return parsed
-
+	try:
+		return _der_private_key(derdata)
+	except _DERFallback:
+		return _pyasn1_private_key(derdata)
@@ -29,6 +29,11 @@ from .PointOps import PointOpEDDSAEncoding, PointOpCurveConversion, PointOpNaive
 class AffineCurvePoint(PointOpEDDSAEncoding, PointOpCurveConversion, PointOpNaiveOrderCalculation, PointOpSerialization):
 	"""Represents a point on a curve in affine (x, y) representation."""
 
+	# Verify that the result of every scalar multiplication is on the curve.
+	# Setting this to False skips the evaluation of the curve equation, which
+	# is a noticeable part of the cost of small scalar multiplications.
+	check_scalar_mul = True
+
 	def __init__(self, x, y, curve):
 		"""Generate a curve point (x, y) on the curve 'curve'. x and y have to
 		be integers. If the neutral element of the group O (for some curves,
@@ -93,14 +98,9 @@ class AffineCurvePoint(PointOpEDDSAEncoding, PointOpCurveConversion, PointOpNaiv
 		assert(isinstance(scalar, int))
 		assert(scalar >= 0)
 
-		result = self.curve.neutral()
-		n = self
-		if scalar > 0:
-			for bit in range(scalar.bit_length()):
-				if (scalar & (1 << bit)):
-					result = result + n
-				n = n + n
-		assert(result.oncurve())
+		result = self.curve.point_scalar_mul(self, scalar)
+		if self.check_scalar_mul:
+			assert(result.oncurve())
 		return result
 
 	def __eq__(self, other):
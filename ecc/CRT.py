@@ -21,8 +21,6 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 #
 
-from .FieldElement import FieldElement
-
 class CRT(object):
 	"""Implements the Chinese Remainder Theorem algorithm where a number of
 	modular congruences are given that all need to be satisfied."""
@@ -53,7 +51,7 @@ class CRT(object):
 				continue
 
 			rem_product = product // modulus
-			one_value = int(FieldElement(rem_product, modulus).inverse())
+			one_value = pow(rem_product, -1, modulus)
 			solution += rem_product * one_value * self._moduli[modulus]
 
 		return solution % product
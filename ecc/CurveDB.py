@@ -21,7 +21,10 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 #
 
+import os
 import enum
+import json
+import hashlib
 import collections
 from .ShortWeierstrassCurve import ShortWeierstrassCurve
 from .MontgomeryCurve import MontgomeryCurve
@@ -36,10 +39,56 @@ from . import Tools
 
 @singleton
 class CurveDB(object):
+	# File in which the digests of the domain parameters of database curves
+	# that have been validated are persisted, or None if they should only be
+	# remembered for the running process.
+	validated_curves_file = os.path.join(os.environ["JOEECC_TABLE_DIR"], "joeecc_validated_curves.json") if ("JOEECC_TABLE_DIR" in os.environ) else None
+
 	def __init__(self):
 		self._entries = { }
 		self._primary_names = set()
 		self._taken_names = set()
+		self._validated = None
+		self._oid_index = None
+		self._params_index = None
+		self._explicit_curves = Tools.LRUCache(64)
+
+	def _validated_digests(self):
+		if self._validated is None:
+			self._validated = set()
+			if (self.validated_curves_file is not None) and os.path.isfile(self.validated_curves_file):
+				# The file is only a cache, an unreadable one counts as empty
+				try:
+					with open(self.validated_curves_file) as f:
+						self._validated = set(str(digest) for digest in json.load(f))
+				except (OSError, ValueError, TypeError):
+					pass
+		return self._validated
+
+	def is_validated(self, digest):
+		"""Returns if the domain parameters with the given digest have been
+		validated before."""
+		return digest in self._validated_digests()
+
+	def set_validated(self, digest):
+		"""Records that the domain parameters with the given digest have been
+		validated and persists this if a validated_curves_file is set. If the
+		file cannot be written, the digest is only remembered in memory."""
+		validated = self._validated_digests()
+		if digest in validated:
+			return
+		validated.add(digest)
+		if self.validated_curves_file is not None:
+			tmpfilename = self.validated_curves_file + ".%d.tmp" % (os.getpid())
+			try:
+				with open(tmpfilename, "w") as f:
+					json.dump(sorted(validated), f)
+				os.replace(tmpfilename, self.validated_curves_file)
+			except OSError:
+				try:
+					os.unlink(tmpfilename)
+				except OSError:
+					pass
 
 	def _checknames(self, curvenames):
 		if len(curvenames & self._taken_names) > 0:
@@ -57,6 +106,36 @@ class CurveDB(object):
 		for aliasname in entry.aliases:
 			clone = entry.clone(secondary_name = aliasname)
 			self._entries[aliasname.lower()] = clone
+		self._oid_index = None
+		self._params_index = None
+
+	def _build_indices(self):
+		"""Builds the lookup tables by OID and by domain parameters. They are
+		created on the first lookup after curves have been registered."""
+		self._oid_index = collections.defaultdict(list)
+		self._params_index = { }
+		for entry in self._entries.values():
+			if not entry.is_aka:
+				if entry.oid is not None:
+					self._oid_index[entry.oid].append(entry)
+				self._params_index.setdefault(entry.domain_params_key, entry)
+			elif entry.get_alternative_oid(entry.name) is not None:
+				# Aliases are only found by their own, alternative OID
+				self._oid_index[entry.oid].append(entry)
+
+	def get_entries_by_oid(self, oid):
+		"""Returns the list of curve entries with the given OID."""
+		if self._oid_index is None:
+			self._build_indices()
+		return self._oid_index.get(oid, [ ])
+
+	def get_entry_by_domain_params(self, curve_class, domain_params):
+		"""Returns the curve entry with exactly the given curve class and
+		domain parameters (as dictionary, e.g. with keys p, a, b, n, h, Gx and
+		Gy for a short Weierstrass curve) or None if there is no such entry."""
+		if self._params_index is None:
+			self._build_indices()
+		return self._params_index.get(_CurveDBEntry.params_key(curve_class, domain_params))
 
 	def curvenames(self):
 		"""Returns the primary names of all curves in the DB."""
@@ -84,18 +163,37 @@ class CurveDB(object):
 			raise KeyError("Curve named '%s' is not known in curve database." % (name))
 		return self._entries[name]
 
+	def get_curve_from_domain_params(self, curve_class, domain_params):
+		"""Returns the curve with the given curve class and explicit domain
+		parameters. If these match a database curve, its shared instance is
+		returned. Otherwise the curve is constructed (and fully checked) once
+		and then shared by subsequent calls with identical parameters, so that
+		its precomputations are reused as well."""
+		entry = self.get_entry_by_domain_params(curve_class, domain_params)
+		if entry is not None:
+			return entry()
+
+		key = _CurveDBEntry.params_key(curve_class, domain_params)
+		curve = self._explicit_curves.get(key)
+		if curve is None:
+			curve = curve_class(**domain_params)
+			self._explicit_curves.put(key, curve)
+		return curve
+
 	def get_curve_from_asn1(self, asn1):
 		"""This function will take a parsed ASN.1 ECParameters class as input
 		and try to return the curve specified within. If the ECParameters
 		specify a named curve by its's OID then a lookup is performed against
 		the curve database and that named curve returned on success if
-		non-ambiguous. If the parameters are exclicitly stated, then an unnamed
-		ShortWeierstrassCurve is constructed."""
+		non-ambiguous. If the parameters are exclicitly stated, then they are
+		resolved by get_curve_from_domain_params(), i.e. to the shared
+		instance of a matching named curve or otherwise to an interned
+		ShortWeierstrassCurve which is constructed only once."""
 
 		if asn1["namedCurve"] is not None:
 			# Curve is encoded as OID, look up from curve DB
 			curve_oid = str(asn1["namedCurve"])
-			entries = [ entry for entry in self if (entry.oid == curve_oid) ]
+			entries = self.get_entries_by_oid(curve_oid)
 			if len(entries) == 0:
 				raise NoSuchCurveException("Trying to load curve with OID %s from curve DB, but no such curve is present in database." % (curve_oid))
 			elif len(entries) > 1:
@@ -112,7 +210,7 @@ class CurveDB(object):
 				(Gx, Gy) = AffineCurvePoint.deserialize_uncompressed(G)
 				n = int(asn1["specifiedCurve"]["order"])
 				h = int(asn1["specifiedCurve"]["cofactor"])
-				curve = ShortWeierstrassCurve(p = p, a = a, b = b, n = n, h = h, Gx = Gx, Gy = Gy)
+				curve = self.get_curve_from_domain_params(ShortWeierstrassCurve, { "p": p, "a": a, "b": b, "n": n, "h": h, "Gx": Gx, "Gy": Gy })
 			else:
 				# Maybe F_2^N curve or some other, unsupported type
 				raise UnsupportedFieldException("Only supports elliptic curves in F_P are supported, but the requested field type OID was %s." % (field_type_oid))
@@ -253,14 +351,39 @@ class _CurveDBEntry(object):
 					value = value.sigint()
 				print("    %-10s %s" % (key, value))
 
+	@staticmethod
+	def params_key(curve_class, domain_params):
+		"""Returns a canonical, hashable representation of a curve class and
+		its domain parameters."""
+		params = tuple(sorted((key, int(value)) for (key, value) in domain_params.items() if key not in ("name", "quirks", "trusted")))
+		return (curve_class.__name__, params)
+
+	@property
+	def domain_params_key(self):
+		"""Returns the canonical representation of curve class and domain
+		parameters of the entry, see params_key()."""
+		return self.params_key(self._curve_class, self._domain_params)
+
+	@property
+	def validation_digest(self):
+		"""Returns a digest over the curve type and domain parameters of the
+		entry, under which its successful validation is recorded."""
+		return hashlib.sha256(repr(self.domain_params_key).encode("utf-8")).hexdigest()
+
 	def __call__(self):
-		"""Instanciate the curve."""
+		"""Instanciate the curve. The domain parameters are validated by the
+		curve constructor only the first time; afterwards they are trusted."""
 		if self._instance is None:
 			# Instanciate actual curve
-			params = self._domain_params
+			digest = self.validation_digest
+			params = dict(self._domain_params)
 			params["name"] = self.name
 			params["quirks"] = self._quirks
+			params["trusted"] = CurveDB().is_validated(digest)
 			self._instance = self._curve_class(**params)
+			if (not params["trusted"]) and __debug__:
+				# Constructor assertions have been evaluated
+				CurveDB().set_validated(digest)
 		return self._instance
 
 	def __str__(self):
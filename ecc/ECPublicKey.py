@@ -31,6 +31,8 @@ class ECPublicKey(PubKeyOpECDSAVerify, PubKeyOpECDSAExploitReusedNonce, PubKeyOp
 
 	def __init__(self, point):
 		self._point = point
+		self._precomputed = None
+		self._precomputed_neg = None
 
 	@property
 	def curve(self):
@@ -40,5 +42,21 @@ class ECPublicKey(PubKeyOpECDSAVerify, PubKeyOpECDSAExploitReusedNonce, PubKeyOp
 	def point(self):
 		return self._point
 
+	@property
+	def precomputed(self):
+		"""Returns the precomputation of the public key point for
+		multi_scalar_mul(). It is calculated on first use and then kept with
+		the key."""
+		if self._precomputed is None:
+			self._precomputed = self.curve.precompute_point(self._point)
+		return self._precomputed
+
+	@property
+	def precomputed_neg(self):
+		"""Returns the precomputation of the conjugated public key point."""
+		if self._precomputed_neg is None:
+			self._precomputed_neg = self.curve.precompute_point(-self._point)
+		return self._precomputed_neg
+
 	def __str__(self):
 		return "PublicKey<%s>" % (str(self.point))
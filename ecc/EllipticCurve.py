@@ -21,11 +21,24 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 #
 
+import os
+import json
+import random
+import hashlib
 from .AffineCurvePoint import AffineCurvePoint
+from . import Tools
 
 class EllipticCurve(object):
 	"""Elliptic curve base class. Provides functionality which all curves have
 	in common."""
+
+	# Window width of the fixed-base table of the generator point G.
+	_FIXED_BASE_WIDTH = 4
+
+	# Directory in which fixed-base tables of generator points are persisted
+	# or None if they should only be kept in memory.
+	fixed_base_table_dir = os.environ.get("JOEECC_TABLE_DIR")
+
 	def __init__(self, p, n, h, Gx, Gy, **kwargs):
 		assert(isinstance(p, int))						# Modulus
 		assert((n is None) or isinstance(n, int))		# Order
@@ -41,6 +54,13 @@ class EllipticCurve(object):
 		else:
 			self._G = None
 
+		self._G_table = None
+		self._G_mul_count = 0
+
+		# Domain parameters of trusted curves (e.g. those of the curve
+		# database which have been validated before) are not checked again
+		self._trusted = kwargs.get("trusted", False)
+
 		if "quirks" in kwargs:
 			self._quirks = { quirk.identifier: quirk for quirk in kwargs["quirks"] }
 		else:
@@ -51,6 +71,12 @@ class EllipticCurve(object):
 		which the curve lies."""
 		return self._p
 
+	@property
+	def trusted(self):
+		"""Returns if the domain parameters were trusted on construction, i.e.
+		if the checks of the generator point were skipped."""
+		return self._trusted
+
 	@property
 	def n(self):
 		"""Returns the order of the subgroup that is created by the generator
@@ -169,6 +195,244 @@ class EllipticCurve(object):
 		"""Returns the negated point -P to a given point P."""
 		raise Exception(NotImplemented)
 
+	def point_scalar_mul(self, P, scalar):
+		"""Returns the scalar point multiplication scalar * P for a
+		non-negative integer scalar. Curves may perform this in an internal
+		(e.g. projective) point representation, which is only converted back
+		to an affine point once at the end. Multiples of the generator point G
+		are calculated using a fixed-base table once G has been used more than
+		once."""
+		if (P is self._G) and self._n:
+			table = self._fixed_base_table()
+			if table is not None:
+				return self._fixed_base_scalar_mul(table, scalar % self._n)
+		return self._variable_base_scalar_mul(P, scalar)
+
+	def _variable_base_scalar_mul(self, P, scalar):
+		"""Returns scalar * P using the width-w NAF of the scalar, with the
+		window width chosen by the size of the scalar. Negative digits are
+		handled by adding the conjugate of the precomputed point."""
+		width = self._wnaf_width(scalar)
+		naf = Tools.wnaf(scalar, width)
+		table = self._wnaf_table(P, width)
+		result = self._projective_neutral()
+		for digit in reversed(naf):
+			result = self._projective_double(result)
+			if digit > 0:
+				result = self._projective_add(result, table[digit // 2])
+			elif digit < 0:
+				result = self._projective_add(result, self._projective_neg(table[-digit // 2]))
+		return self._from_projective(result)
+
+	def _wnaf_table(self, P, width):
+		"""Returns the odd multiples P, 3P, 5P, ... (2^(w - 1) - 1)P in
+		internal point representation."""
+		Q = self._to_projective(P)
+		table = [ Q ]
+		if width > 2:
+			Q2 = self._projective_double(Q)
+			for i in range(1, 1 << (width - 2)):
+				table.append(self._projective_add(table[-1], Q2))
+		return table
+
+	@staticmethod
+	def _wnaf_width(scalar):
+		"""Returns the wNAF window width that is used for a scalar, i.e. a
+		width which keeps the number of point additions plus the number of
+		precomputed points small."""
+		bits = scalar.bit_length()
+		if bits <= 16:
+			return 2
+		elif bits <= 64:
+			return 3
+		elif bits <= 192:
+			return 4
+		elif bits <= 512:
+			return 5
+		else:
+			return 6
+
+	def precompute_point(self, P, width = None):
+		"""Returns a precomputation of the point P that can be passed to
+		multi_scalar_mul() instead of P, for points that are multiplied with
+		many different scalars (e.g. a public key that verifies many
+		signatures). It holds the normalized odd multiples of P for a wNAF
+		window which is one wider than for a single multiplication."""
+		if width is None:
+			width = self._wnaf_width(self.n) + 1
+		table = self._from_projective_many(self._wnaf_table(P, width))
+		return (width, [ self._to_projective(point) for point in table ])
+
+	def multi_scalar_mul(self, terms):
+		"""Returns the sum k1 * P1 + k2 * P2 + ... of scalar point
+		multiplications given as a list of (scalar, point) tuples. A point may
+		also be given as the result of precompute_point(). Uses Straus'
+		interleaving method with the scalars in wNAF form, i.e. all products
+		share one chain of point doublings. This is considerably faster than
+		computing the products separately, e.g. for signature verification."""
+		nafs = [ ]
+		tables = [ ]
+		for (scalar, P) in terms:
+			assert(isinstance(scalar, int))
+			assert(scalar >= 0)
+			if isinstance(P, tuple):
+				(width, table) = P
+			else:
+				width = self._wnaf_width(scalar)
+				table = self._wnaf_table(P, width)
+			nafs.append(Tools.wnaf(scalar, width))
+			tables.append(table)
+
+		result = self._projective_neutral()
+		for i in reversed(range(max((len(naf) for naf in nafs), default = 0))):
+			result = self._projective_double(result)
+			for (naf, table) in zip(nafs, tables):
+				if (i < len(naf)) and (naf[i] != 0):
+					digit = naf[i]
+					if digit > 0:
+						result = self._projective_add(result, table[digit // 2])
+					else:
+						result = self._projective_add(result, self._projective_neg(table[-digit // 2]))
+		return self._from_projective(result)
+
+	def _domainparams_digest(self):
+		"""Returns a hex digest over the domain parameters of the curve."""
+		params = sorted((key, str(value)) for (key, value) in self.domainparamdict.items())
+		return hashlib.sha256(repr(params).encode("utf-8")).hexdigest()
+
+	def _fixed_base_table_filename(self):
+		if self.fixed_base_table_dir is None:
+			return None
+		return os.path.join(self.fixed_base_table_dir, "joeecc_%s_w%d.json" % (self._domainparams_digest(), self._FIXED_BASE_WIDTH))
+
+	def _fixed_base_table(self):
+		"""Returns the fixed-base table of the generator point G, or None if
+		it should not be used (yet). The table is built on the second use of G
+		and, if a fixed_base_table_dir is set, loaded from or stored to disk.
+		A stored table which does not pass _load_fixed_base_table() is
+		rebuilt and overwritten."""
+		if self._G_table is not None:
+			return self._G_table
+
+		filename = self._fixed_base_table_filename()
+		if (filename is not None) and os.path.isfile(filename):
+			self._G_table = self._load_fixed_base_table(filename)
+			if self._G_table is not None:
+				return self._G_table
+		else:
+			self._G_mul_count += 1
+			if self._G_mul_count < 2:
+				return None
+
+		self._G_table = self._build_fixed_base_table()
+		if filename is not None:
+			points = self._from_projective_many([ point for window in self._G_table for point in window ])
+			points = [ (None, None) if point.is_neutral else (int(point.x), int(point.y)) for point in points ]
+			tmpfilename = filename + ".%d.tmp" % (os.getpid())
+			try:
+				with open(tmpfilename, "w") as f:
+					json.dump(points, f)
+				os.replace(tmpfilename, filename)
+			except OSError:
+				# Not persisted, the table is still used from memory
+				try:
+					os.unlink(tmpfilename)
+				except OSError:
+					pass
+		return self._G_table
+
+	def _load_fixed_base_table(self, filename):
+		"""Returns the fixed-base table stored in a file, or None if the file
+		does not hold a table of G. The table needs to have the expected size,
+		start with G and only contain points on the curve, and one
+		multiplication with a random scalar has to agree with the
+		variable-base result."""
+		width = self._FIXED_BASE_WIDTH
+		windowcnt = (self.n.bit_length() + width - 1) // width
+		try:
+			with open(filename) as f:
+				points = json.load(f)
+			points = [ self.neutral() if (x is None) else AffineCurvePoint(x, y, self) for (x, y) in points ]
+		except (OSError, ValueError, TypeError, AssertionError):
+			return None
+		if (len(points) != windowcnt * ((1 << width) - 1)) or (points[0] != self.G):
+			return None
+		if not all(point.oncurve() for point in points):
+			return None
+
+		points = [ self._to_projective(point) for point in points ]
+		table = [ points[i : i + (1 << width) - 1] for i in range(0, len(points), (1 << width) - 1) ]
+		scalar = random.SystemRandom().randrange(self.n)
+		if self._fixed_base_scalar_mul(table, scalar) != self._variable_base_scalar_mul(self.G, scalar):
+			return None
+		return table
+
+	def _build_fixed_base_table(self):
+		"""Calculates the fixed-base table of G. For every w-bit window j of
+		the scalar, the table holds i * 2^(w * j) * G for 1 <= i < 2^w. All
+		points are normalized to affine coordinates, so that additions with
+		them are cheaper."""
+		width = self._FIXED_BASE_WIDTH
+		table = [ ]
+		base = self._to_projective(self.G)
+		for j in range((self.n.bit_length() + width - 1) // width):
+			window = [ base ]
+			for i in range(2, 1 << width):
+				window.append(self._projective_add(window[-1], base))
+			table.append(window)
+			base = self._projective_double(window[(1 << (width - 1)) - 1])
+		points = self._from_projective_many([ point for window in table for point in window ])
+		points = [ self._to_projective(point) for point in points ]
+		return [ points[i : i + (1 << width) - 1] for i in range(0, len(points), (1 << width) - 1) ]
+
+	def _fixed_base_scalar_mul(self, table, scalar):
+		"""Returns scalar * G using only additions of precomputed points."""
+		width = self._FIXED_BASE_WIDTH
+		mask = (1 << width) - 1
+		result = self._projective_neutral()
+		for window in table:
+			digit = scalar & mask
+			if digit != 0:
+				result = self._projective_add(result, window[digit - 1])
+			scalar >>= width
+		return self._from_projective(result)
+
+	def _to_projective(self, P):
+		"""Converts an affine point to the internal point representation that
+		is used for scalar multiplication. By default, this is the affine point
+		itself; curves which implement faster coordinate systems override the
+		_projective_* methods."""
+		return P
+
+	def _from_projective(self, P):
+		"""Converts a point in internal representation back to an affine
+		point."""
+		return P
+
+	def _from_projective_many(self, points):
+		"""Converts a list of points in internal representation back to
+		affine points. Curves with projective coordinates override this to
+		share one field inversion among all points."""
+		return [ self._from_projective(P) for P in points ]
+
+	def _projective_neutral(self):
+		"""Returns the neutral element in internal representation."""
+		return self.neutral()
+
+	def _projective_add(self, P, Q):
+		"""Adds two points in internal representation."""
+		return self.point_addition(P, Q)
+
+	def _projective_double(self, P):
+		"""Doubles a point in internal representation."""
+		return self.point_addition(P, P)
+
+	def _projective_neg(self, P):
+		"""Negates a point in internal representation."""
+		if P.is_neutral:
+			return P
+		return self.point_conjugate(P)
+
 	def compress(self, P):
 		"""Returns the compressed representation of the point P on the
 		curve. Not all curves may support this operation."""
@@ -201,3 +465,6 @@ class EllipticCurve(object):
 	def __ne__(self, other):
 		return not (self == other)
 
+	def __hash__(self):
+		return hash(self.domainparams)
+
@@ -21,67 +21,184 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 #
 
-import random
+from . import Tools
+
+class Field(object):
+	"""Represents the prime field F(p). Field.get() returns one shared
+	instance per recently used modulus for all elements of that field, which
+	holds precomputed values such as the exponents used by Euler's criterion and
+	the square root, as well as a quadratic non-residue once one has been
+	found."""
+	__slots__ = ("p", "legendre_exponent", "sqrt_exponent", "atkin_exponent", "special_form", "_qnr", "_tonelli_shanks")
+	# Shared instances by modulus. The cache is bounded so that fields of
+	# short-lived moduli do not pile up; an evicted field remains usable by
+	# the elements which still refer to it.
+	_instances = Tools.LRUCache(64)
+
+	def __init__(self, p):
+		self.p = p
+		self.legendre_exponent = (p - 1) // 2
+		self.sqrt_exponent = (p + 1) // 4 if ((p % 4) == 3) else None
+		self.atkin_exponent = (p - 5) // 8 if ((p % 8) == 5) else None
+		self._qnr = None
+		self._tonelli_shanks = None
+		self.special_form = self._pseudo_mersenne_form(p)
+
+	@staticmethod
+	def _pseudo_mersenne_form(p):
+		"""Returns (k, c) if the modulus is of the pseudo-Mersenne form p = 2^k
+		- c with c being at most half as long as p (e.g. 2^255 - 19 or the
+		secp256k1 prime 2^256 - 2^32 - 977), otherwise None."""
+		k = p.bit_length()
+		c = (1 << k) - p
+		if (k < 64) or (c.bit_length() > k // 2):
+			return None
+		return (k, c)
+
+	def _reduce_pseudo_mersenne(self, x):
+		"""Reduces x modulo p = 2^k - c by folding the bits above 2^k back in,
+		multiplied by c, using 2^k = c mod p. Only available if special_form
+		is set. Field multiplication does not use it, since in CPython the
+		generic modulo operation on long integers is faster."""
+		if x < 0:
+			return x % self.p
+		(k, c) = self.special_form
+		mask = (1 << k) - 1
+		while x >> k:
+			x = (x & mask) + ((x >> k) * c)
+		if x >= self.p:
+			x -= self.p
+		return x
+
+	@classmethod
+	def get(cls, p):
+		"""Returns the shared Field instance for the modulus p."""
+		field = cls._instances.get(p)
+		if field is None:
+			field = cls(p)
+			cls._instances.put(p, field)
+		return field
+
+	@property
+	def qnr(self):
+		"""Returns the smallest quadratic non-residue in the field. It is
+		determined once and then cached."""
+		if self._qnr is None:
+			candidate = 2
+			while Tools.jacobi_symbol(candidate, self.p) != -1:
+				candidate += 1
+			self._qnr = FieldElement(candidate, self)
+		return self._qnr
+
+	@property
+	def tonelli_shanks_params(self):
+		"""Returns the tuple (q, s, c) with p - 1 = q * 2^s for an odd q and
+		c = z^q for the quadratic non-residue z. It is determined once and
+		then cached."""
+		if self._tonelli_shanks is None:
+			q = self.p - 1
+			s = 0
+			while (q % 2) == 0:
+				s += 1
+				q >>= 1
+			self._tonelli_shanks = (q, s, pow(int(self.qnr), q, self.p))
+		return self._tonelli_shanks
+
+	def element(self, intvalue):
+		"""Returns the field element of an integer value that is already
+		reduced modulo p."""
+		element = object.__new__(FieldElement)
+		element._intvalue = intvalue
+		element._field = self
+		element._qnr = None
+		return element
+
+	def __repr__(self):
+		return "F(0x%x)" % (self.p)
 
 class FieldElement(object):
 	"""Represents an element in a finite field over a (prime) modulus."""
+	__slots__ = ("_intvalue", "_field", "_qnr")
 
 	def __init__(self, intvalue, modulus):
 		assert(isinstance(intvalue, int))
-		assert(isinstance(modulus, int))
-		self._intvalue = intvalue % modulus
-		self._modulus = modulus
+		if isinstance(modulus, Field):
+			self._field = modulus
+		else:
+			assert(isinstance(modulus, int))
+			self._field = Field.get(modulus)
+		self._intvalue = intvalue % self._field.p
 		self._qnr = None
 
 	@property
 	def modulus(self):
 		"""Returns the field's modulus."""
-		return self._modulus
+		return self._field.p
 
-	@staticmethod
-	def _eea(a, b):
-		"""Extended euclidian algorithm. Returns the gcd of (a, b) and the
-		Bezout-coefficients."""
-		assert(isinstance(a, int))
-		assert(isinstance(b, int))
-		(s, t, u, v) = (1, 0, 0, 1)
-		while b != 0:
-			(q, r) = (a // b, a % b)
-			(unew, vnew) = (s, t)
-			s = u - (q * s)
-			t = v - (q * t)
-			(a, b) = (b, r)
-			(u, v) = (unew, vnew)
-		return (a, u, v)
+	@property
+	def field(self):
+		"""Returns the shared Field object of the element."""
+		return self._field
 
 	def inverse(self):
-		if int(self) == 0:
+		if self._intvalue == 0:
 			raise Exception("Trying to invert zero")
-		(gcd, u, v) = self._eea(int(self), self.modulus)
-		return FieldElement(v, self.modulus)
+		return self._field.element(pow(self._intvalue, -1, self._field.p))
+
+	@staticmethod
+	def batch_inverse(elements):
+		"""Returns the list of inverses of a list of field elements, which all
+		have to be nonzero elements of the same field. Uses Montgomery's
+		trick, i.e. one single inversion and 3(N - 1) multiplications."""
+		if len(elements) == 0:
+			return [ ]
+		field = elements[0]._field
+		p = field.p
+
+		# Prefix products a1, a1 * a2, ..., a1 * ... * aN
+		products = [ ]
+		product = 1
+		for element in elements:
+			product = (product * element._intvalue) % p
+			products.append(product)
+		if product == 0:
+			raise Exception("Trying to invert zero")
+
+		inverse = pow(product, -1, p)
+		inverses = [ None ] * len(elements)
+		for i in reversed(range(1, len(elements))):
+			inverses[i] = field.element((inverse * products[i - 1]) % p)
+			inverse = (inverse * elements[i]._intvalue) % p
+		inverses[0] = field.element(inverse)
+		return inverses
 
 	@property
 	def is_qr(self):
-		"""Returns if the number is a quadratic residue according to Euler's
-		criterion."""
+		"""Returns if the number is a quadratic residue, i.e. a nonzero
+		square."""
 		return not self.is_qnr
 
 	@property
 	def is_qnr(self):
-		"""Returns if the number is a quadratic non-residue according to
-		Euler's criterion."""
+		"""Returns if the number is a quadratic non-residue. Zero is considered
+		a non-residue as well."""
 		if self._qnr is None:
-			self._qnr = int(self ** ((self._modulus - 1) // 2)) != 1
+			self._qnr = self.legrende_symbol != 1
 		return self._qnr
 
 	@property
 	def legrende_symbol(self):
 		"""Returns the Legrende symbol of the field element, i.e. 0 if the
 		element is 0 mod p, 1 if it is a quadratic residue mod p or -1 if it is
-		a quadratic non-residue mod p."""
-		if self == 0:
+		a quadratic non-residue mod p. It is calculated as Jacobi symbol, which
+		needs no exponentiation; for an even modulus Euler's criterion is used
+		instead."""
+		if self._intvalue == 0:
 			return 0
-		elif self.is_qr:
+		p = self._field.p
+		if (p & 1) == 1:
+			return Tools.jacobi_symbol(self._intvalue, p)
+		elif pow(self._intvalue, self._field.legendre_exponent, p) == 1:
 			return 1
 		else:
 			return -1
@@ -90,35 +207,42 @@ class FieldElement(object):
 		"""Performs the Tonelli-Shanks algorithm to determine the square root
 		on an element. Note that the algorithm only works if the value it is
 		performed on is a quadratic residue mod p."""
-		q = self._modulus - 1
-		s = 0
-		while (q % 2) == 0:
-			s += 1
-			q >>= 1
-		assert(q * (2 ** s) == self.modulus - 1)
-
-		while True:
-			z = FieldElement(random.randint(1, self.modulus - 1), self.modulus)
-			if z.is_qnr:
-				break
-		assert(z.is_qnr)
-		c = z ** q
-
-		r = self ** ((q + 1) // 2)
-		t = self ** q
+		p = self._field.p
+		(q, s, c) = self._field.tonelli_shanks_params
+
+		r = pow(self._intvalue, (q + 1) // 2, p)
+		t = pow(self._intvalue, q, p)
 		m = s
-		while int(t) != 1:
-			for i in range(1, m):
-				if int(t ** (1 << i)) == 1:
-					break
-
-			b = c ** (1 << (m - i - 1))
-			r = r * b
-			t = t * (b ** 2)
-			c = b ** 2
+		while t != 1:
+			# Find the least i with t^(2^i) = 1 by repeated squaring
+			i = 0
+			t2i = t
+			while t2i != 1:
+				t2i = (t2i * t2i) % p
+				i += 1
+			if i == m:
+				return None
+
+			b = pow(c, 1 << (m - i - 1), p)
+			c = (b * b) % p
+			r = (r * b) % p
+			t = (t * c) % p
 			m = i
 
-		return r
+		return self._field.element(r)
+
+	def _atkin_sqrt(self):
+		"""Determines the square root for p = 5 mod 8 using Atkin's method,
+		which needs only a single exponentiation. Returns None if the value is
+		a quadratic non-residue."""
+		p = self._field.p
+		a = self._intvalue
+		v = pow(2 * a, self._field.atkin_exponent, p)
+		i = (2 * a * v * v) % p
+		root = (a * v * (i - 1)) % p
+		if (root * root) % p != a:
+			return None
+		return self._field.element(root)
 
 	def sqr(self):
 		"""Return the squared value."""
@@ -127,14 +251,22 @@ class FieldElement(object):
 	def sqrt(self):
 		"""Returns the square root of the value or None if the value is a
 		quadratic non-residue mod p."""
-		if self.is_qnr:
+		if self._intvalue == 0:
 			return None
 
-		if (self._modulus % 4) == 3:
-			root = self ** ((self._modulus + 1) // 4)
-			assert(root * root == self)
+		if self._field.sqrt_exponent is not None:
+			root = self ** self._field.sqrt_exponent
+			if root * root != self:
+				return None
+		elif self._field.atkin_exponent is not None:
+			root = self._atkin_sqrt()
+		elif self.is_qnr:
+			return None
 		else:
 			root = self._tonelli_shanks_sqrt()
+		if root is None:
+			self._qnr = True
+			return None
 
 		if (int(root) & 1) == 0:
 			return (root, -root)
@@ -153,13 +285,14 @@ class FieldElement(object):
 					return candidate
 
 	def __checktype(self, value):
-		if isinstance(value, int):
-			return value
-		elif isinstance(value, FieldElement):
-			if value.modulus == self.modulus:
-				return int(value)
+		if isinstance(value, FieldElement):
+			# Elements of the same field share their Field object
+			if (value._field is self._field) or (value._field.p == self._field.p):
+				return value._intvalue
 			else:
 				raise Exception("Cannot perform meaningful arithmetic operations on field elements in different fields.")
+		elif isinstance(value, int):
+			return value
 
 	def sigint(self):
 		"""Returns a signed integer if the negative value is less than 10
@@ -173,12 +306,9 @@ class FieldElement(object):
 
 	@classmethod
 	def any_qnr(cls, modulus):
-		"""Returns any quadratic non-residue in F(modulus)."""
-		for i in range(1000):
-			candidate = cls(random.randint(2, modulus - 1), modulus)
-			if candidate.is_qnr:
-				return candidate
-		raise Exception("Could not find a QNR in F_%d with a reasonable amount of tries." % (modulus))
+		"""Returns a quadratic non-residue in F(modulus), namely the smallest
+		one which is cached by the field."""
+		return Field.get(modulus).qnr
 
 	def __int__(self):
 		return self._intvalue
@@ -187,32 +317,37 @@ class FieldElement(object):
 		value = self.__checktype(value)
 		if value is None:
 			return NotImplemented
-		return FieldElement(int(self) + value, self.modulus)
+		field = self._field
+		return field.element((self._intvalue + value) % field.p)
 
 	def __sub__(self, value):
 		value = self.__checktype(value)
 		if value is None:
 			return NotImplemented
-		return FieldElement(int(self) - value, self.modulus)
+		field = self._field
+		return field.element((self._intvalue - value) % field.p)
 
 	def __mul__(self, value):
 		value = self.__checktype(value)
 		if value is None:
 			return NotImplemented
-		return FieldElement(int(self) * value, self.modulus)
+		field = self._field
+		return field.element((self._intvalue * value) % field.p)
 
 	def __floordiv__(self, value):
 		value = self.__checktype(value)
 		if value is None:
 			return NotImplemented
-		return self * FieldElement(value, self.modulus).inverse()
+		return self * FieldElement(value, self._field).inverse()
 
 	def __pow__(self, exponent):
 		assert(isinstance(exponent, int))
-		return FieldElement(pow(int(self), exponent, self.modulus), self.modulus)
+		field = self._field
+		return field.element(pow(self._intvalue, exponent, field.p))
 
 	def __neg__(self):
-		return FieldElement(-int(self), self.modulus)
+		field = self._field
+		return field.element(-self._intvalue % field.p)
 
 	def __radd__(self, value):
 		return self + value
@@ -228,17 +363,17 @@ class FieldElement(object):
 
 	def __eq__(self, value):
 		value = self.__checktype(value)
-		return int(self) == (value % self.modulus)
+		return self._intvalue == (value % self._field.p)
 
 	def __ne__(self, other):
 		return not (self == other)
 
 	def __lt__(self, value):
 		value = self.__checktype(value)
-		return int(self) < value
+		return self._intvalue < value
 
 	def __hash__(self):
-		return hash((self._intvalue, self._modulus))
+		return hash((self._intvalue, self._field.p))
 
 	def __repr__(self):
 		return str(self)
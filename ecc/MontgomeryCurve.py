@@ -50,12 +50,13 @@ class MontgomeryCurve(EllipticCurve):
 		# Check that the curve is not singular
 		assert(self.b * ((self.a ** 2) - 4) != 0)
 
-		if self._G is not None:
+		if (self._G is not None) and (not self._trusted):
 			# Check that the generator G is on the curve
 			assert(self._G.oncurve())
 
-			# Check that the generator G is of curve order
-			assert((self.n * self.G).is_neutral)
+			# Check that the generator G is of curve order, without the
+			# fixed-base table which reduces the scalar modulo n
+			assert(self._variable_base_scalar_mul(self.G, self.n).is_neutral)
 
 	@property
 	@doc_inherit(EllipticCurve)
@@ -90,6 +91,9 @@ class MontgomeryCurve(EllipticCurve):
 		if P.is_neutral:
 			# P is at infinity, O + Q = Q
 			result = Q
+		elif Q.is_neutral:
+			# Q is at infinity, P + O = P
+			result = P
 		elif P == -Q:
 			# P == -Q, return O (point at infinity)
 			result = AffineCurvePoint.neutral(self)
@@ -105,6 +109,103 @@ class MontgomeryCurve(EllipticCurve):
 			result = AffineCurvePoint(int(newx), int(newy), self)
 		return result
 
+	def _ladder(self, x, scalar):
+		"""Performs the Montgomery ladder on the x coordinate of a point P.
+		Returns the tuple (kP, (k + 1)P) with both points given in projective
+		(X : Z) representation."""
+		p = self.p
+		a24 = int((self.a + 2) // 4)
+		(X0, Z0) = (1, 0)
+		(X1, Z1) = (x, 1)
+		for bit in reversed(range(scalar.bit_length())):
+			# Differential addition R0 + R1 with difference P
+			U = ((X0 - Z0) * (X1 + Z1)) % p
+			V = ((X0 + Z0) * (X1 - Z1)) % p
+			(Xa, Za) = (((U + V) ** 2) % p, (x * (U - V) ** 2) % p)
+
+			# Doubling of either R0 or R1
+			if (scalar >> bit) & 1:
+				(Xd, Zd) = (X1, Z1)
+			else:
+				(Xd, Zd) = (X0, Z0)
+			S = ((Xd + Zd) ** 2) % p
+			D = ((Xd - Zd) ** 2) % p
+			E = S - D
+			(Xd, Zd) = ((S * D) % p, (E * (D + a24 * E)) % p)
+
+			if (scalar >> bit) & 1:
+				(X0, Z0, X1, Z1) = (Xa, Za, Xd, Zd)
+			else:
+				(X0, Z0, X1, Z1) = (Xd, Zd, Xa, Za)
+		return ((X0, Z0), (X1, Z1))
+
+	def xonly_scalar_mul(self, x, scalar):
+		"""Returns the affine x coordinate of the scalar point multiplication
+		scalar * P given only the x coordinate of P, or None if the result is
+		the neutral element. Uses the Montgomery ladder with differential
+		addition and requires only a single field inversion at the end."""
+		assert(isinstance(x, int))
+		assert(scalar >= 0)
+		((X, Z), _) = self._ladder(x % self.p, scalar)
+		if Z == 0:
+			return None
+		return int(FieldElement(Z, self.p).inverse() * X)
+
+	def _ladder_recover_y(self, P, scalar):
+		"""Performs the Montgomery ladder on the affine point P and recovers
+		the y coordinate of the result using the Okeya-Sakurai formula.
+		Returns scalar * P in projective (X : Y : Z) representation."""
+		p = self.p
+		(x, y) = (int(P.x), int(P.y))
+		((XQ, ZQ), (XR, ZR)) = self._ladder(x, scalar)
+		if ZQ == 0:
+			# kP = O
+			return (0, 1, 0)
+		elif ZR == 0:
+			# (k + 1)P = O, i.e. kP = -P
+			return (x, -y % p, 1)
+
+		v1 = (x * ZQ) % p
+		v2 = XQ + v1
+		v3 = (((XQ - v1) ** 2) * XR) % p
+		v1 = (2 * int(self.a) * ZQ) % p
+		v2 = v2 + v1
+		v4 = x * XQ + ZQ
+		v2 = (v2 * v4 - v1 * ZQ) * ZR
+		Y = (v2 - v3) % p
+		v1 = (2 * int(self.b) * y * ZQ * ZR) % p
+		return ((v1 * XQ) % p, Y, (v1 * ZQ) % p)
+
+	def xonly_double_scalar_mul(self, k1, P1, k2, P2):
+		"""Returns the affine x coordinate of k1 * P1 + k2 * P2, or None if
+		the result is the neutral element. Both products are calculated with
+		the Montgomery ladder; their y coordinates are recovered in projective
+		coordinates and the sum requires only one field inversion."""
+		assert(k1 >= 0)
+		assert(k2 >= 0)
+		(X1, Y1, Z1) = self._ladder_recover_y(P1, k1)
+		(X2, Y2, Z2) = self._ladder_recover_y(P2, k2)
+		p = self.p
+		if Z1 == 0:
+			return None if (Z2 == 0) else int(FieldElement(Z2, p).inverse() * X2)
+		elif Z2 == 0:
+			return int(FieldElement(Z1, p).inverse() * X1)
+
+		u = (Y2 * Z1 - Y1 * Z2) % p
+		v = (X2 * Z1 - X1 * Z2) % p
+		if v == 0:
+			# Points are identical or conjugates of each other
+			Q1 = AffineCurvePoint(int(FieldElement(Z1, p).inverse() * X1), int(FieldElement(Z1, p).inverse() * Y1), self)
+			Q2 = AffineCurvePoint(int(FieldElement(Z2, p).inverse() * X2), int(FieldElement(Z2, p).inverse() * Y2), self)
+			result = self.point_addition(Q1, Q2)
+			return None if result.is_neutral else int(result.x)
+
+		# x3 = B * lambda^2 - A - x1 - x2 with lambda = u / v
+		ZZ = (Z1 * Z2) % p
+		vv = (v * v) % p
+		numerator = int(self.b) * u * u * ZZ - (int(self.a) * ZZ + X1 * Z2 + X2 * Z1) * vv
+		return int(FieldElement(vv * ZZ, p).inverse() * numerator)
+
 	def to_twistededwards(self, a = None):
 		"""Converts the domain parameters of this curve to domain parameters of
 		a birationally equivalent twisted Edwards curve.  The user may select a
@@ -154,6 +255,7 @@ class MontgomeryCurve(EllipticCurve):
 			h = self.h,
 			Gx = int(G_twed.x),
 			Gy = int(G_twed.y),
+			trusted = self.trusted,
 		)
 		return twed_curve
 
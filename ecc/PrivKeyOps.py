@@ -231,6 +231,20 @@ class PrivKeyOpLoad(object):
 		"""Loads an EC private key from a PEM-encoded 'EC PRIVATE KEY' file."""
 		return cls.load_derdata(Tools.load_pem_data(pemfilename, "EC PRIVATE KEY"))
 
+	@classmethod
+	def load_der_many(cls, derdatas):
+		"""Loads EC private keys from an iterable of DER-encoded ASN.1 bytes
+		objects and yields them one by one."""
+		for derdata in derdatas:
+			yield cls.load_derdata(derdata)
+
+	@classmethod
+	def load_pem_bundle(cls, pemfilename):
+		"""Yields all EC private keys of a PEM file which contains any number
+		of concatenated 'EC PRIVATE KEY' blocks. The file is streamed, i.e.
+		memory use does not depend on the number of keys."""
+		return cls.load_der_many(Tools.iter_pem_data(pemfilename, "EC PRIVATE KEY"))
+
 	@classmethod
 	def load_der(cls, derfilename):
 		"""Loads an EC private key from a DER-encoded ASN.1 file."""
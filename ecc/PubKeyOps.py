@@ -86,7 +86,7 @@ class PubKeyOpECDSAVerify(object):
 		u1 = int(e * w)
 		u2 = int(r * w)
 
-		pt = (u1 * self.curve.G) + (u2 * self.point)
+		pt = self.curve.multi_scalar_mul([ (u1, self.curve.G), (u2, self.precomputed) ])
 		x1 = int(pt.x) % self.curve.n
 		return x1 == r
 
@@ -103,7 +103,8 @@ class PubKeyOpEDDSAVerify(object):
 	def eddsa_verify(self, message, signature):
 		"""Verify an EdDSA signature over a message."""
 		h = Tools.bytestoint_le(Tools.eddsa_hash(signature.R.eddsa_encode() + self.point.eddsa_encode() + message))
-		return (signature.s * self.curve.G) == signature.R + (h * self.point)
+		# s * G == R + h * A is checked as s * G - h * A == R
+		return self.curve.multi_scalar_mul([ (signature.s, self.curve.G), (h, self.precomputed_neg) ]) == signature.R
 
 
 class PubKeyOpEDDSAEncode(object):
@@ -115,9 +116,13 @@ class PubKeyOpEDDSAEncode(object):
 	@classmethod
 	def eddsa_decode(cls, curve, encoded_pubkey):
 		"""Decodes a EdDSA-encoded public key from its serialized (bytes)
-		form."""
-		pubkey = AffineCurvePoint.eddsa_decode(curve, encoded_pubkey)
-		return cls(pubkey)
+		form. Decoded keys are cached, see PubKeyOpLoad."""
+		key = (cls, curve, bytes(encoded_pubkey))
+		pubkey = PubKeyOpLoad.key_cache.get(key)
+		if pubkey is None:
+			pubkey = cls(AffineCurvePoint.eddsa_decode(curve, encoded_pubkey))
+			PubKeyOpLoad.key_cache.put(key, pubkey)
+		return pubkey
 
 class PubKeyOpECIESEncrypt(object):
 	def ecies_encrypt(self, r = None):
@@ -141,19 +146,43 @@ class PubKeyOpECIESEncrypt(object):
 
 
 class PubKeyOpLoad(object):
+	# Public keys are immutable, so keys which are decoded repeatedly from the
+	# same encoding are shared, together with the precomputations that they
+	# carry (e.g. for verifying many signatures).
+	key_cache = Tools.LRUCache(256)
+
 	@classmethod
 	def load_derdata(cls, derdata):
 		"""Loads an EC public key from a DER-encoded ASN.1 bytes object."""
-		asn1 = parse_asn1_public_key(derdata)
-		curve = CurveDB().get_curve_from_asn1(asn1["algorithm"]["parameters"])
-		point = AffineCurvePoint.deserialize_uncompressed(Tools.bits_to_bytes(asn1["subjectPublicKey"]), curve)
-		return cls(point)
+		key = (cls, bytes(derdata))
+		pubkey = cls.key_cache.get(key)
+		if pubkey is None:
+			asn1 = parse_asn1_public_key(derdata)
+			curve = CurveDB().get_curve_from_asn1(asn1["algorithm"]["parameters"])
+			point = AffineCurvePoint.deserialize_uncompressed(asn1["subjectPublicKey"], curve)
+			pubkey = cls(point)
+			cls.key_cache.put(key, pubkey)
+		return pubkey
 
 	@classmethod
 	def load_pem(cls, pemfilename):
 		"""Loads an EC public key from a PEM-encoded 'PUBLIC KEY' file."""
 		return cls.load_derdata(Tools.load_pem_data(pemfilename, "PUBLIC KEY"))
 
+	@classmethod
+	def load_der_many(cls, derdatas):
+		"""Loads EC public keys from an iterable of DER-encoded ASN.1 bytes
+		objects and yields them one by one."""
+		for derdata in derdatas:
+			yield cls.load_derdata(derdata)
+
+	@classmethod
+	def load_pem_bundle(cls, pemfilename):
+		"""Yields all EC public keys of a PEM file which contains any number of
+		concatenated 'PUBLIC KEY' blocks. The file is streamed, i.e. memory
+		use does not depend on the number of keys."""
+		return cls.load_der_many(Tools.iter_pem_data(pemfilename, "PUBLIC KEY"))
+
 	@classmethod
 	def load_der(cls, derfilename):
 		"""Loads an EC public key from a DER-encoded ASN.1 file."""
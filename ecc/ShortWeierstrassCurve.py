@@ -50,14 +50,15 @@ class ShortWeierstrassCurve(EllipticCurve, CurveOpIsomorphism, CurveOpExportSage
 		# Check that the curve is not singular
 		assert((4 * (self.a ** 3)) + (27 * (self.b ** 2)) != 0)
 
-		if self._G is not None:
+		if (self._G is not None) and (not self._trusted):
 			# Check that the generator G is on the curve
 			assert(self._G.oncurve())
 
 			if self.n is not None:
 				# Check that the generator G is of curve order if a order was
-				# passed as well
-				assert((self.n * self.G).is_neutral)
+				# passed as well, without the fixed-base table which
+				# reduces the scalar modulo n
+				assert(self._variable_base_scalar_mul(self.G, self.n).is_neutral)
 
 	@classmethod
 	def init_rawcurve(cls, a, b, p):
@@ -171,6 +172,99 @@ class ShortWeierstrassCurve(EllipticCurve, CurveOpIsomorphism, CurveOpExportSage
 			result = AffineCurvePoint(int(newx), int(newy), self)
 		return result
 
+	@doc_inherit(EllipticCurve)
+	def _to_projective(self, P):
+		# Jacobian coordinates (X : Y : Z) with x = X / Z^2, y = Y / Z^3. The
+		# neutral element has Z = 0.
+		if P.is_neutral:
+			return (1, 1, 0)
+		return (int(P.x), int(P.y), 1)
+
+	@doc_inherit(EllipticCurve)
+	def _from_projective(self, P):
+		(X, Y, Z) = P
+		if Z == 0:
+			return self.neutral()
+		zinv = int(FieldElement(Z, self.p).inverse())
+		zinv2 = (zinv * zinv) % self.p
+		return AffineCurvePoint((X * zinv2) % self.p, (Y * zinv2 * zinv) % self.p, self)
+
+	@doc_inherit(EllipticCurve)
+	def _from_projective_many(self, points):
+		finite = [ i for (i, (X, Y, Z)) in enumerate(points) if Z != 0 ]
+		zinvs = FieldElement.batch_inverse([ FieldElement(points[i][2], self.p) for i in finite ])
+		result = [ self.neutral() ] * len(points)
+		for (i, zinv) in zip(finite, zinvs):
+			(X, Y, Z) = points[i]
+			zinv = int(zinv)
+			zinv2 = (zinv * zinv) % self.p
+			result[i] = AffineCurvePoint((X * zinv2) % self.p, (Y * zinv2 * zinv) % self.p, self)
+		return result
+
+	@doc_inherit(EllipticCurve)
+	def _projective_neutral(self):
+		return (1, 1, 0)
+
+	@doc_inherit(EllipticCurve)
+	def _projective_neg(self, P):
+		(X, Y, Z) = P
+		return (X, -Y % self.p, Z)
+
+	@doc_inherit(EllipticCurve)
+	def _projective_double(self, P):
+		# "dbl-2007-bl" from the Explicit-Formulas Database
+		(X1, Y1, Z1) = P
+		if (Z1 == 0) or (Y1 == 0):
+			return (1, 1, 0)
+		p = self.p
+		XX = (X1 * X1) % p
+		YY = (Y1 * Y1) % p
+		YYYY = (YY * YY) % p
+		ZZ = (Z1 * Z1) % p
+		S = (2 * ((X1 + YY) ** 2 - XX - YYYY)) % p
+		M = (3 * XX + int(self.a) * ZZ * ZZ) % p
+		X3 = (M * M - 2 * S) % p
+		Y3 = (M * (S - X3) - 8 * YYYY) % p
+		Z3 = ((Y1 + Z1) ** 2 - YY - ZZ) % p
+		return (X3, Y3, Z3)
+
+	@doc_inherit(EllipticCurve)
+	def _projective_add(self, P, Q):
+		# "add-2007-bl" from the Explicit-Formulas Database
+		(X1, Y1, Z1) = P
+		(X2, Y2, Z2) = Q
+		if Z1 == 0:
+			return Q
+		if Z2 == 0:
+			return P
+		p = self.p
+		Z1Z1 = (Z1 * Z1) % p
+		U2 = (X2 * Z1Z1) % p
+		S2 = (Y2 * Z1 * Z1Z1) % p
+		if Z2 == 1:
+			# Mixed addition with a normalized (e.g. precomputed) point
+			(Z2Z2, U1, S1) = (1, X1, Y1)
+		else:
+			Z2Z2 = (Z2 * Z2) % p
+			U1 = (X1 * Z2Z2) % p
+			S1 = (Y1 * Z2 * Z2Z2) % p
+		H = (U2 - U1) % p
+		r = (2 * (S2 - S1)) % p
+		if H == 0:
+			if r == 0:
+				# P == Q, point doubling
+				return self._projective_double(P)
+			else:
+				# P == -Q, return O (point at infinity)
+				return (1, 1, 0)
+		I = (4 * H * H) % p
+		J = (H * I) % p
+		V = (U1 * I) % p
+		X3 = (r * r - J - 2 * V) % p
+		Y3 = (r * (V - X3) - 2 * S1 * J) % p
+		Z3 = (((Z1 + Z2) ** 2 - Z1Z1 - Z2Z2) * H) % p
+		return (X3, Y3, Z3)
+
 	@doc_inherit(EllipticCurve)
 	def compress(self, P):
 		return (int(P.x), int(P.y) % 2)
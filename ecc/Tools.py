@@ -24,6 +24,7 @@
 import hashlib
 import base64
 import inspect
+import collections
 
 def bytestoint_le(data):
 	"""Converts given bytes to a little-endian integer value."""
@@ -71,26 +72,73 @@ def eddsa_hash(data):
 	(SHA-512)."""
 	return hashlib.sha512(data).digest()
 
-def load_pem_data(filename, specifier):
-	"""Loads the PEM payload, designated with a BEGIN and END specifier, from a
-	file given by its filename."""
-	data = None
+def iter_pem_data(filename, specifier):
+	"""Yields the decoded payloads of all PEM blocks of a file which are
+	designated with the given BEGIN and END specifier, in file order. The file
+	is read line by line, so that arbitrarily large bundles of concatenated
+	blocks are processed with constant memory."""
+	spec_begin = "-----BEGIN " + specifier + "-----"
+	spec_end = "-----END " + specifier + "-----"
 	with open(filename, "r") as f:
-		spec_begin = "-----BEGIN " + specifier + "-----"
-		spec_end = "-----END " + specifier + "-----"
+		data = None
 		for line in f:
 			line = line.rstrip()
 			if (data is None) and (line == spec_begin):
 				data = [ ]
 			elif (data is not None) and (line == spec_end):
-				break
+				yield base64.b64decode("".join(data).encode("utf-8"))
+				data = None
 			elif data is not None:
 				data.append(line)
+
+def load_pem_data(filename, specifier):
+	"""Loads the PEM payload, designated with a BEGIN and END specifier, from a
+	file given by its filename."""
+	data = next(iter_pem_data(filename, specifier), None)
 	if data is None:
 		raise Exception("Trying to parse PEM file with specifier '%s', but no such block in file found." % (specifier))
-	data = base64.b64decode("".join(data).encode("utf-8"))
 	return data
 
+def wnaf(scalar, width):
+	"""Returns the width-w non-adjacent form of a non-negative integer as a
+	list of digits, least significant digit first. All nonzero digits are odd
+	and smaller than 2^(w - 1) in absolute value and out of any w consecutive
+	digits at most one is nonzero."""
+	assert(width >= 2)
+	digits = [ ]
+	while scalar > 0:
+		if scalar & 1:
+			digit = scalar & ((1 << width) - 1)
+			if digit >= (1 << (width - 1)):
+				digit -= (1 << width)
+			scalar -= digit
+		else:
+			digit = 0
+		digits.append(digit)
+		scalar >>= 1
+	return digits
+
+def jacobi_symbol(a, n):
+	"""Returns the Jacobi symbol (a / n) for an odd positive integer n using
+	the binary algorithm based on quadratic reciprocity. For a prime n, this
+	is the Legendre symbol, i.e. 0 if n divides a, 1 if a is a quadratic
+	residue mod n and -1 otherwise."""
+	assert((n > 0) and ((n & 1) == 1))
+	a %= n
+	result = 1
+	while a != 0:
+		# Remove factors of two, (2 / n) = -1 if n = 3, 5 mod 8
+		shift = (a & -a).bit_length() - 1
+		a >>= shift
+		if (shift & 1) and ((n & 7) in (3, 5)):
+			result = -result
+
+		# Reciprocity, (a / n) = -(n / a) if a = n = 3 mod 4
+		if a & n & 2:
+			result = -result
+		(a, n) = (n % a, a)
+	return result if (n == 1) else 0
+
 def is_power_of_two(value):
 	"""Returns True if the given value is a positive power of two, False
 	otherwise."""
@@ -110,3 +158,35 @@ def is_power_of_two(value):
 #			break
 #	return cls
 
+
+class LRUCache(object):
+	"""Dictionary-like cache which holds at most maxsize entries. When it is
+	full, the least recently used entry is evicted."""
+	def __init__(self, maxsize = 128):
+		self._maxsize = maxsize
+		self._entries = collections.OrderedDict()
+
+	@property
+	def maxsize(self):
+		return self._maxsize
+
+	def get(self, key, default = None):
+		if key not in self._entries:
+			return default
+		self._entries.move_to_end(key)
+		return self._entries[key]
+
+	def put(self, key, value):
+		self._entries[key] = value
+		self._entries.move_to_end(key)
+		while len(self._entries) > self._maxsize:
+			self._entries.popitem(last = False)
+
+	def clear(self):
+		self._entries.clear()
+
+	def __contains__(self, key):
+		return key in self._entries
+
+	def __len__(self):
+		return len(self._entries)
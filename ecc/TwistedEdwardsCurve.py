@@ -50,12 +50,13 @@ class TwistedEdwardsCurve(EllipticCurve):
 		# Check that the curve is not singular
 		assert(self.d * (1 - self.d) != 0)
 
-		if self._G is not None:
+		if (self._G is not None) and (not self._trusted):
 			# Check that the generator G is on the curve
 			assert(self._G.oncurve())
 
-			# Check that the generator G is of curve order
-			assert((self.n * self.G).is_neutral)
+			# Check that the generator G is of curve order, without the
+			# fixed-base table which reduces the scalar modulo n
+			assert(self._variable_base_scalar_mul(self.G, self.n).is_neutral)
 
 	@property
 	@doc_inherit(EllipticCurve)
@@ -112,6 +113,67 @@ class TwistedEdwardsCurve(EllipticCurve):
 		y = (P.y * Q.y - self.a * P.x * Q.x) // (1 - self.d * P.x * Q.x * P.y * Q.y)
 		return AffineCurvePoint(int(x), int(y), self)
 
+	@doc_inherit(EllipticCurve)
+	def _to_projective(self, P):
+		# Extended coordinates (X : Y : Z : T) with x = X / Z, y = Y / Z and
+		# x * y = T / Z
+		return (int(P.x), int(P.y), 1, int(P.x * P.y))
+
+	@doc_inherit(EllipticCurve)
+	def _from_projective(self, P):
+		(X, Y, Z, T) = P
+		zinv = FieldElement(Z, self.p).inverse()
+		return AffineCurvePoint(int(zinv * X), int(zinv * Y), self)
+
+	@doc_inherit(EllipticCurve)
+	def _from_projective_many(self, points):
+		zinvs = FieldElement.batch_inverse([ FieldElement(Z, self.p) for (X, Y, Z, T) in points ])
+		return [ AffineCurvePoint(int(zinv * X), int(zinv * Y), self) for ((X, Y, Z, T), zinv) in zip(points, zinvs) ]
+
+	@doc_inherit(EllipticCurve)
+	def _projective_neutral(self):
+		return (0, 1, 1, 0)
+
+	@doc_inherit(EllipticCurve)
+	def _projective_neg(self, P):
+		(X, Y, Z, T) = P
+		return (-X % self.p, Y, Z, -T % self.p)
+
+	@doc_inherit(EllipticCurve)
+	def _projective_double(self, P):
+		# "dbl-2008-hwcd" from the Explicit-Formulas Database
+		(X1, Y1, Z1, T1) = P
+		p = self.p
+		A = (X1 * X1) % p
+		B = (Y1 * Y1) % p
+		C = (2 * Z1 * Z1) % p
+		D = (int(self.a) * A) % p
+		E = ((X1 + Y1) ** 2 - A - B) % p
+		G = (D + B) % p
+		F = (G - C) % p
+		H = (D - B) % p
+		return ((E * F) % p, (G * H) % p, (F * G) % p, (E * H) % p)
+
+	@doc_inherit(EllipticCurve)
+	def _projective_add(self, P, Q):
+		# Unified "add-2008-hwcd" from the Explicit-Formulas Database
+		(X1, Y1, Z1, T1) = P
+		(X2, Y2, Z2, T2) = Q
+		p = self.p
+		A = (X1 * X2) % p
+		B = (Y1 * Y2) % p
+		C = (T1 * int(self.d) * T2) % p
+		D = (Z1 * Z2) % p
+		E = ((X1 + Y1) * (X2 + Y2) - A - B) % p
+		F = (D - C) % p
+		G = (D + C) % p
+		H = (B - int(self.a) * A) % p
+		if (F * G) % p == 0:
+			# Exceptional case of the formula on incomplete curves, resort to
+			# affine addition
+			return self._to_projective(self.point_addition(self._from_projective(P), self._from_projective(Q)))
+		return ((E * F) % p, (G * H) % p, (F * G) % p, (E * H) % p)
+
 	def to_montgomery(self, b = None):
 		"""Converts the twisted Edwards curve domain parameters to Montgomery
 		domain parameters. For this conversion, b can be chosen semi-freely.
@@ -160,6 +222,7 @@ class TwistedEdwardsCurve(EllipticCurve):
 			h = self.h,
 			Gx = int(G_m.x),
 			Gy = int(G_m.y),
+			trusted = self.trusted,
 		)
 
 		return montgomery_curve
@@ -23,7 +23,10 @@
 
 import unittest
 import random
-from .. import getcurvebyname
+import os
+import tempfile
+from .. import getcurvebyname, ShortWeierstrassCurve
+from ..CurveDB import CurveDB, _CurveDBEntry
 
 class CurveTests(unittest.TestCase):
 	_TEST_POINTS = {
@@ -110,6 +113,10 @@ class CurveTests(unittest.TestCase):
 			self.assertEqual(P.x, points[3][0])
 			self.assertEqual(P.y, points[3][1])
 
+	@staticmethod
+	def _sw_domain_params(curve):
+		return { "p": curve.p, "a": int(curve.a), "b": int(curve.b), "n": curve.n, "h": curve.h, "Gx": int(curve.G.x), "Gy": int(curve.G.y) }
+
 	def test_scalar_multiplication(self):
 		for (curvename, points) in self._TEST_POINTS.items():
 			curve = getcurvebyname(curvename)
@@ -140,3 +147,74 @@ class CurveTests(unittest.TestCase):
 			P = curve.neutral() + Q
 			self.assertEqual(P, Q)
 
+
+	def test_trusted_parameters(self):
+		params = { "a": 2, "b": 3, "p": 263, "n": 270, "h": 1, "Gx": 200, "Gy": 39 }
+		with tempfile.TemporaryDirectory() as tmpdir:
+			cdb = CurveDB()
+			(validated, validated_file) = (cdb._validated, cdb.validated_curves_file)
+			try:
+				cdb._validated = None
+				cdb.validated_curves_file = os.path.join(tmpdir, "validated.json")
+				curve = _CurveDBEntry("testcurve", ShortWeierstrassCurve, params)()
+				self.assertFalse(curve.trusted)
+				self.assertTrue(os.path.isfile(cdb.validated_curves_file))
+
+				cdb._validated = None
+				curve = _CurveDBEntry("testcurve", ShortWeierstrassCurve, params)()
+				self.assertTrue(curve.trusted)
+				self.assertTrue((curve.n * curve.G).is_neutral)
+			finally:
+				(cdb._validated, cdb.validated_curves_file) = (validated, validated_file)
+
+		# The validation cache file must never break the curve lookup
+		with tempfile.TemporaryDirectory() as tmpdir:
+			cdb = CurveDB()
+			(validated, validated_file) = (cdb._validated, cdb.validated_curves_file)
+			try:
+				cdb._validated = None
+				cdb.validated_curves_file = os.path.join(tmpdir, "nonexistent", "validated.json")
+				curve = _CurveDBEntry("testcurve", ShortWeierstrassCurve, params)()
+				self.assertFalse(curve.trusted)
+				self.assertTrue(cdb.is_validated(_CurveDBEntry("testcurve", ShortWeierstrassCurve, params).validation_digest))
+				self.assertEqual(os.listdir(tmpdir), [ ])
+
+				cdb._validated = None
+				cdb.validated_curves_file = os.path.join(tmpdir, "validated.json")
+				with open(cdb.validated_curves_file, "w") as f:
+					f.write("{ corrupt")
+				curve = _CurveDBEntry("testcurve", ShortWeierstrassCurve, params)()
+				self.assertFalse(curve.trusted)
+				cdb._validated = None
+				curve = _CurveDBEntry("testcurve", ShortWeierstrassCurve, params)()
+				self.assertTrue(curve.trusted)
+			finally:
+				(cdb._validated, cdb.validated_curves_file) = (validated, validated_file)
+
+		# User-supplied parameters are checked in any case
+		with self.assertRaises(AssertionError):
+			ShortWeierstrassCurve(a = 2, b = 3, p = 263, n = 269, h = 1, Gx = 200, Gy = 39)
+
+	def test_curvedb_indices(self):
+		cdb = CurveDB()
+		self.assertEqual([ entry.name for entry in cdb.get_entries_by_oid("1.2.840.10045.3.1.7") ], [ "prime256v1" ])
+		self.assertEqual([ entry.name for entry in cdb.get_entries_by_oid("2.23.43.1.4.6") ], [ "wap-wsg-idm-ecid-wtls6" ])
+		self.assertEqual(cdb.get_entries_by_oid("1.2.3.4"), [ ])
+
+		params = self._sw_domain_params(getcurvebyname("secp256r1"))
+		self.assertEqual(cdb.get_entry_by_domain_params(ShortWeierstrassCurve, params).name, "prime256v1")
+		params["h"] = 2
+		self.assertIsNone(cdb.get_entry_by_domain_params(ShortWeierstrassCurve, params))
+
+	def test_explicit_curve_interning(self):
+		cdb = CurveDB()
+		params = { "a": 2, "b": 3, "p": 263, "n": 270, "h": 1, "Gx": 200, "Gy": 39 }
+		curve = cdb.get_curve_from_domain_params(ShortWeierstrassCurve, params)
+		self.assertFalse(curve.hasname)
+		self.assertIs(cdb.get_curve_from_domain_params(ShortWeierstrassCurve, dict(params)), curve)
+		params["Gx"] = 126
+		params["Gy"] = 76
+		self.assertIsNot(cdb.get_curve_from_domain_params(ShortWeierstrassCurve, params), curve)
+
+		curve = getcurvebyname("prime256v1")
+		self.assertIs(cdb.get_curve_from_domain_params(ShortWeierstrassCurve, self._sw_domain_params(curve)), curve)
@@ -86,6 +86,7 @@ class Ed25519BasicTests(unittest.TestCase):
 
 		pubkey = ECPublicKey.eddsa_decode(curve, bytes.fromhex("44779636a02f08199bf6ac32a27ac7245f809160a75200198df897f639734f70"))
 		self.assertEqual(pubkey.point, privkey.pubkey.point)
+		self.assertIs(ECPublicKey.eddsa_decode(curve, bytes.fromhex("44779636a02f08199bf6ac32a27ac7245f809160a75200198df897f639734f70")), pubkey)
 
 
 	def test_sig_encoding(self):
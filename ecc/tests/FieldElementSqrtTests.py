@@ -78,3 +78,30 @@ class FieldElementSqrtTests(unittest.TestCase):
 			self.assertEqual(r[0] * r[0], q)
 			self.assertEqual(r[1] * r[1], q)
 
+
+	def _test_exhaustive(self, p):
+		squares = set((i * i) % p for i in range(1, p))
+		for i in range(p):
+			r = FieldElement(i, p).sqrt()
+			if i in squares:
+				self.assertEqual(r[0] * r[0], FieldElement(i, p))
+				self.assertEqual(r[1] * r[1], FieldElement(i, p))
+				self.assertEqual(int(r[0]) % 2, 0)
+			else:
+				self.assertIsNone(r)
+
+	def test_atkin(self):
+		for p in [ 13, 29, 101, 709 ]:
+			self.assertEqual(p % 8, 5)
+			self._test_exhaustive(p)
+		p = (2 ** 255) - 19
+		x = FieldElement(random.randrange(p), p)
+		self.assertIn(x, x.sqr().sqrt())
+
+	def test_tonelli_shanks(self):
+		for p in [ 17, 97, 257, 641 ]:
+			self.assertEqual(p % 8, 1)
+			self._test_exhaustive(p)
+		p = (2 ** 224) - (2 ** 96) + 1
+		x = FieldElement(random.randrange(p), p)
+		self.assertIn(x, x.sqr().sqrt())
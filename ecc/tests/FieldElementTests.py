@@ -22,7 +22,8 @@
 #
 
 import unittest
-from ..FieldElement import FieldElement
+from ..FieldElement import FieldElement, Field
+from .. import Tools
 
 class FieldElementTests(unittest.TestCase):
 	def test_basic(self):
@@ -58,6 +59,57 @@ class FieldElementTests(unittest.TestCase):
 		self.assertEqual(s1 * s1, x)
 		self.assertEqual(s2 * s2, x)
 
+	def test_field(self):
+		a = FieldElement(15, 23)
+		b = FieldElement(20, Field.get(23))
+		self.assertIs(a.field, b.field)
+		self.assertEqual(a.modulus, 23)
+		self.assertIs((a * b).field, a.field)
+		self.assertEqual(FieldElement(-8, 23), a)
+		self.assertEqual(hash(FieldElement(38, 23)), hash(a))
+		self.assertFalse(hasattr(a, "__dict__"))
+		with self.assertRaises(Exception):
+			a + FieldElement(1, 29)
+
+		# The field cache is bounded, elements of evicted fields still work
+		for p in range(1001, 1201, 2):
+			Field.get(p)
+		self.assertLessEqual(len(Field._instances), Field._instances.maxsize)
+		self.assertEqual(a * FieldElement(20, 23), FieldElement(1, 23))
+
+	def test_any_qnr(self):
+		for p in [ 23, 101, (2 ** 255) - 19 ]:
+			qnr = FieldElement.any_qnr(p)
+			self.assertTrue(qnr.is_qnr)
+			self.assertIs(qnr, Field.get(p).qnr)
+
+	def test_batch_inverse(self):
+		elements = [ FieldElement(i, 101) for i in [ 1, 2, 3, 50, 100, 2 ] ]
+		self.assertEqual(FieldElement.batch_inverse(elements), [ element.inverse() for element in elements ])
+		self.assertEqual(FieldElement.batch_inverse([ FieldElement(7, 101) ]), [ FieldElement(7, 101).inverse() ])
+		self.assertEqual(FieldElement.batch_inverse([ ]), [ ])
+		with self.assertRaises(Exception):
+			FieldElement.batch_inverse([ FieldElement(3, 101), FieldElement(0, 101) ])
+
+	def test_special_reduction(self):
+		for p in [ (2 ** 255) - 19, (2 ** 256) - (2 ** 32) - 977, (2 ** 221) - 3, (2 ** 127) - 1 ]:
+			field = Field(p)
+			self.assertIsNotNone(field.special_form)
+			for x in [ 0, 1, p - 1, p, p + 1, (p - 1) ** 2, -5, 12345 * p + 678 ]:
+				self.assertEqual(field._reduce_pseudo_mersenne(x), x % p)
+		self.assertIsNone(Field(2 ** 256 - 2 ** 224 + 2 ** 192 + 2 ** 96 - 1).special_form)
+		self.assertIsNone(Field(101).special_form)
+
+	def test_legendre_symbol(self):
+		for p in [ 3, 5, 23, 101, 263, 2003 ]:
+			for i in range(p):
+				euler = pow(i, (p - 1) // 2, p)
+				self.assertEqual(FieldElement(i, p).legrende_symbol, -1 if (euler == p - 1) else euler)
+				self.assertEqual(FieldElement(i, p).is_qr, euler == 1)
+		self.assertEqual(Tools.jacobi_symbol(2, 15), 1)
+		self.assertEqual(Tools.jacobi_symbol(7, 15), -1)
+		self.assertEqual(Tools.jacobi_symbol(6, 15), 0)
+
 	def test_exp(self):
 		self.assertEqual(int(FieldElement(19, 23) ** 5), 11)
 		self.assertEqual(int(FieldElement(19, 23) ** 12), 4)
@@ -28,7 +28,10 @@ import os
 from ..ECPrivateKey import ECPrivateKey
 from ..ECPublicKey import ECPublicKey
 from ..Exceptions import NoSuchCurveException, UnsupportedFieldException
-from ..ASN1 import have_asn1_support
+from ..ASN1 import have_asn1_support, parse_asn1_public_key
+from ..ASN1Schema import have_pyasn1
+from .. import ASN1
+from .. import Tools
 from .. import getcurvebyname
 
 class _Tempfile(object):
@@ -46,6 +49,7 @@ class _Tempfile(object):
 	def __exit__(self, *args):
 		assert(self._filename is not None)
 		os.unlink(self._filename)
+		self._filename = None
 
 
 @unittest.skipIf(not have_asn1_support(), "ASN.1 support not available")
@@ -97,6 +101,10 @@ YuNedijfrGVhxQIBAQMeAAQX5FDlFzBnfqJxbX32dM8TwC8gxmvi5GS8pom3
 -----END PUBLIC KEY-----
 """)
 
+	_PUBKEY_PEM_BUNDLE = _Tempfile(_PUBKEY_PEM_OID._content + "Some comment\n" + _PUBKEY_PEM_EXPLICIT._content + _PUBKEY_PEM_OID._content)
+
+	_PRIVKEY_PEM_BUNDLE = _Tempfile(_PRIVKEY_PEM_OID._content + _PRIVKEY_PEM_EXPLICIT._content)
+
 
 	def test_load_privkey_fp_oid(self):
 		with self._PRIVKEY_PEM_OID as filename:
@@ -113,6 +121,9 @@ YuNedijfrGVhxQIBAQMeAAQX5FDlFzBnfqJxbX32dM8TwC8gxmvi5GS8pom3
 		self.assertEqual(key.pubkey.point.y, 0x75ad20af9bc25a0fadd79aa6ae649ebc)
 		self.assertEqual(key.curve, getcurvebyname("secp128r2"))
 
+		# Explicitly encoded database curves map to the named instance
+		self.assertIs(key.curve, getcurvebyname("secp128r2"))
+
 	def test_load_privkey_f2m_oid(self):
 		with self._PRIVKEY_PEM_F2M_OID as filename:
 			with self.assertRaises(NoSuchCurveException):
@@ -139,3 +150,42 @@ YuNedijfrGVhxQIBAQMeAAQX5FDlFzBnfqJxbX32dM8TwC8gxmvi5GS8pom3
 			self.assertEqual(key.point.y, 0xcf13c02f20c66be2e464bca689b7)
 			self.assertEqual(key.point.curve, getcurvebyname("secp112r1"))
 
+
+	def test_load_pubkey_bundle(self):
+		with self._PUBKEY_PEM_BUNDLE as filename:
+			keys = list(ECPublicKey.load_pem_bundle(filename))
+		self.assertEqual(len(keys), 3)
+		for key in keys:
+			self.assertEqual(key.point.x, 0x17e450e51730677ea2716d7df674)
+			self.assertEqual(key.point.y, 0xcf13c02f20c66be2e464bca689b7)
+			self.assertIs(key.point.curve, getcurvebyname("secp112r1"))
+
+	def test_load_privkey_bundle(self):
+		with self._PRIVKEY_PEM_BUNDLE as filename:
+			keys = list(ECPrivateKey.load_pem_bundle(filename))
+		self.assertEqual([ key.scalar for key in keys ], [ 0x0af3c5cdafcb151a41d5c48fd6dd9079 ] * 2)
+		self.assertEqual(list(ECPrivateKey.load_der_many([ ])), [ ])
+
+	@unittest.skipIf(not have_pyasn1, "pyasn1 not available")
+	def test_der_parser_matches_pyasn1(self):
+		for pemfile in [ self._PUBKEY_PEM_OID, self._PUBKEY_PEM_EXPLICIT ]:
+			with pemfile as filename:
+				derdata = Tools.load_pem_data(filename, "PUBLIC KEY")
+			self.assertEqual(ASN1._der_public_key(derdata), ASN1._pyasn1_public_key(derdata))
+		for pemfile in [ self._PRIVKEY_PEM_OID, self._PRIVKEY_PEM_EXPLICIT, self._PRIVKEY_PEM_F2M_EXPLICIT ]:
+			with pemfile as filename:
+				derdata = Tools.load_pem_data(filename, "EC PRIVATE KEY")
+			self.assertEqual(ASN1._der_private_key(derdata), ASN1._pyasn1_private_key(derdata))
+
+	@unittest.skipIf(not have_pyasn1, "pyasn1 not available")
+	def test_ber_fallback(self):
+		with self._PUBKEY_PEM_OID as filename:
+			derdata = Tools.load_pem_data(filename, "PUBLIC KEY")
+
+		# Outer SEQUENCE with indefinite length is not DER
+		berdata = bytes([ 0x30, 0x80 ]) + derdata[2:] + bytes([ 0x00, 0x00 ])
+		with self.assertRaises(ASN1._DERFallback):
+			ASN1._der_public_key(berdata)
+		self.assertEqual(parse_asn1_public_key(berdata), parse_asn1_public_key(derdata))
+		key = ECPublicKey.load_derdata(berdata)
+		self.assertEqual(key.point.x, 0x17e450e51730677ea2716d7df674)
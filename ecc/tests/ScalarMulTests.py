@@ -0,0 +1,230 @@
+#
+#	joeecc - A small Elliptic Curve Cryptography Demonstration.
+#	Copyright (C) 2011-2015 Johannes Bauer
+#
+#	This file is part of joeecc.
+#
+#	joeecc is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	joeecc is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with joeecc; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+#
+
+import unittest
+import random
+import os
+import tempfile
+import json
+from .. import getcurvebyname, ShortWeierstrassCurve, AffineCurvePoint
+from .. import Tools
+from ..TwistedEdwardsCurve import TwistedEdwardsCurve
+
+class ScalarMulTests(unittest.TestCase):
+	@staticmethod
+	def _affine_scalar_mul(P, scalar):
+		result = P.curve.neutral()
+		for bit in reversed(range(scalar.bit_length())):
+			result = P.curve.point_addition(result, result)
+			if (scalar >> bit) & 1:
+				result = P.curve.point_addition(result, P)
+		return result
+
+	def _test_curve(self, curve, count = 10):
+		scalars = [ 0, 1, 2, 3, curve.n - 1, curve.n, curve.n + 1 ]
+		scalars += [ random.randint(1, curve.n - 1) for i in range(count) ]
+		P = curve.G * random.randint(1, curve.n - 1)
+		for scalar in scalars:
+			self.assertEqual(curve.point_scalar_mul(P, scalar), self._affine_scalar_mul(P, scalar))
+
+	def test_small_shortweierstrass(self):
+		curve = ShortWeierstrassCurve(3, 99, 101, 0, 0, 12, 34)
+		for scalar in range(200):
+			self.assertEqual(curve.G * scalar, self._affine_scalar_mul(curve.G, scalar))
+
+		# Doubling of a point with y = 0 yields the point at infinity
+		curve = ShortWeierstrassCurve(-3, 5, 23, 0, 0, 13, 22)
+		P = AffineCurvePoint(5, 0, curve)
+		self.assertTrue((P * 2).is_neutral)
+		self.assertEqual(P * 3, P)
+
+	def test_shortweierstrass(self):
+		for curvename in [ "secp112r1", "secp256r1", "brainpoolP320r1" ]:
+			self._test_curve(getcurvebyname(curvename))
+
+	def test_twistededwards(self):
+		for curvename in [ "ed25519", "Ed448-Goldilocks", "E-521" ]:
+			self._test_curve(getcurvebyname(curvename))
+
+	def test_twistededwards_incomplete(self):
+		# d = 4 is a quadratic residue mod 13, i.e. the curve is not complete
+		curve = TwistedEdwardsCurve(1, 4, 13, None, None, None, None)
+		self.assertFalse(curve.is_complete)
+		points = [ AffineCurvePoint(x, y, curve) for x in range(13) for y in range(13) ]
+		points = [ P for P in points if P.oncurve() ]
+		for P in points:
+			for scalar in range(10):
+				try:
+					expected = self._affine_scalar_mul(P, scalar)
+				except Exception:
+					# Affine addition is undefined for this case, too
+					continue
+				self.assertEqual(curve.point_scalar_mul(P, scalar), expected)
+
+	def test_montgomery_ladder(self):
+		for curvename in [ "curve25519", "M-221" ]:
+			curve = getcurvebyname(curvename)
+			P = curve.G * random.randint(1, curve.n - 1)
+			Q = curve.G * random.randint(1, curve.n - 1)
+			for scalar in [ 0, 1, 2, curve.n - 1, curve.n, random.randint(1, curve.n - 1) ]:
+				R = self._affine_scalar_mul(P, scalar)
+				self.assertEqual(curve.xonly_scalar_mul(int(P.x), scalar), None if R.is_neutral else int(R.x))
+
+				k2 = random.randint(1, curve.n - 1)
+				R = R + self._affine_scalar_mul(Q, k2)
+				self.assertEqual(curve.xonly_double_scalar_mul(scalar, P, k2, Q), None if R.is_neutral else int(R.x))
+
+			self.assertEqual(curve.xonly_double_scalar_mul(5, P, 7, P), int((P * 12).x))
+			self.assertEqual(curve.xonly_double_scalar_mul(1, P, curve.n - 1, P), None)
+
+	def test_wnaf(self):
+		for width in range(2, 7):
+			for scalar in [ 0, 1, 2, 0xff, random.getrandbits(256) ]:
+				digits = Tools.wnaf(scalar, width)
+				self.assertEqual(sum(digit << i for (i, digit) in enumerate(digits)), scalar)
+				for (i, digit) in enumerate(digits):
+					if digit != 0:
+						self.assertEqual(digit % 2, 1)
+						self.assertLess(abs(digit), 1 << (width - 1))
+						self.assertTrue(all(other == 0 for other in digits[i + 1 : i + width]))
+
+	def test_multi_scalar_mul(self):
+		for curvename in [ "secp112r1", "secp256r1", "ed25519", "curve25519" ]:
+			curve = getcurvebyname(curvename)
+			points = [ curve.G ] + [ curve.G * random.randint(1, curve.n - 1) for i in range(2) ]
+			for scalars in [ (0, 0, 0), (1, 0, 0), (1, 1, 1), (0, curve.n - 1, 1), (random.randint(1, curve.n - 1), random.getrandbits(30), random.randint(1, curve.n - 1)) ]:
+				expected = curve.neutral()
+				for (scalar, P) in zip(scalars, points):
+					expected = expected + self._affine_scalar_mul(P, scalar)
+				self.assertEqual(curve.multi_scalar_mul(list(zip(scalars, points))), expected)
+			self.assertTrue(curve.multi_scalar_mul([ (1, points[1]), (curve.n - 1, points[1]) ]).is_neutral)
+			self.assertTrue(curve.multi_scalar_mul([ ]).is_neutral)
+
+	def test_fixed_base_table(self):
+		for curvename in [ "secp112r1", "secp256r1", "ed25519", "curve25519" ]:
+			curve = getcurvebyname(curvename)
+			for scalar in [ 0, 1, 2, 15, 16, curve.n - 1, curve.n, curve.n + 1, 2 * curve.n + 7, random.randint(1, curve.n - 1) ]:
+				self.assertEqual(curve.G * scalar, self._affine_scalar_mul(curve.G, scalar))
+			self.assertIsNotNone(curve._G_table)
+
+	def test_fixed_base_table_persistence(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			curve = getcurvebyname("secp112r1")
+			curve.fixed_base_table_dir = tmpdir
+			curve._G_table = None
+			curve._G_mul_count = 1
+			scalar = random.randint(1, curve.n - 1)
+			expected = curve.G * scalar
+			self.assertEqual(len(os.listdir(tmpdir)), 1)
+
+			curve._G_table = None
+			curve._G_mul_count = 0
+			self.assertEqual(curve.G * scalar, expected)
+			self.assertIsNotNone(curve._G_table)
+			del curve.fixed_base_table_dir
+			curve._G_table = None
+
+	def test_fixed_base_table_tampered(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			curve = getcurvebyname("secp112r1")
+			curve.fixed_base_table_dir = tmpdir
+			try:
+				curve._G_table = None
+				curve._G_mul_count = 1
+				curve.G * 1
+				filename = curve._fixed_base_table_filename()
+				with open(filename) as f:
+					stored = json.load(f)
+
+				# Every entry replaced by its double, or all but G
+				doubled = [ (int(P.x), int(P.y)) for P in (2 * AffineCurvePoint(x, y, curve) for (x, y) in stored) ]
+				for points in [ doubled, stored[:1] + doubled[1:], stored[:-1], [ [ 1, 2 ] ] * len(stored) ]:
+					with open(filename, "w") as f:
+						json.dump(points, f)
+					curve._G_table = None
+					scalar = random.randint(1, curve.n - 1)
+					self.assertEqual(curve.G * scalar, self._affine_scalar_mul(curve.G, scalar))
+					with open(filename) as f:
+						self.assertEqual(json.load(f), stored)
+
+				with open(filename, "w") as f:
+					f.write("garbage")
+				curve._G_table = None
+				self.assertEqual(curve.G * 12345, self._affine_scalar_mul(curve.G, 12345))
+			finally:
+				del curve.fixed_base_table_dir
+				curve._G_table = None
+
+	def test_fixed_base_table_missing_dir(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			curve = getcurvebyname("secp112r1")
+			curve.fixed_base_table_dir = os.path.join(tmpdir, "nonexistent")
+			try:
+				curve._G_table = None
+				curve._G_mul_count = 1
+				scalar = random.randint(1, curve.n - 1)
+				self.assertEqual(curve.G * scalar, self._affine_scalar_mul(curve.G, scalar))
+				self.assertIsNotNone(curve._G_table)
+				self.assertEqual(os.listdir(tmpdir), [ ])
+			finally:
+				del curve.fixed_base_table_dir
+				curve._G_table = None
+
+	def test_generator_order_check(self):
+		# The order check must not go through the fixed-base table, which
+		# reduces the scalar modulo n
+		curve = getcurvebyname("secp112r1")
+		self.assertFalse(curve._variable_base_scalar_mul(curve.G, curve.n - 1).is_neutral)
+		with self.assertRaises(AssertionError):
+			ShortWeierstrassCurve(a = int(curve.a), b = int(curve.b), p = curve.p, n = curve.n - 1, h = curve.h, Gx = int(curve.G.x), Gy = int(curve.G.y))
+
+	def test_unchecked_scalar_mul(self):
+		curve = getcurvebyname("secp256r1")
+		P = curve.G * random.randint(1, curve.n - 1)
+		scalar = random.randint(1, curve.n - 1)
+		expected = self._affine_scalar_mul(P, scalar)
+		AffineCurvePoint.check_scalar_mul = False
+		try:
+			self.assertEqual(P * scalar, expected)
+		finally:
+			AffineCurvePoint.check_scalar_mul = True
+
+	def test_precompute_point(self):
+		for curvename in [ "secp112r1", "secp256r1", "ed25519", "curve25519" ]:
+			curve = getcurvebyname(curvename)
+			P = curve.G * random.randint(1, curve.n - 1)
+			precomputed = curve.precompute_point(P)
+			for scalars in [ (0, 1), (1, curve.n - 1), (random.randint(1, curve.n - 1), random.randint(1, curve.n - 1)) ]:
+				expected = self._affine_scalar_mul(curve.G, scalars[0]) + self._affine_scalar_mul(P, scalars[1])
+				self.assertEqual(curve.multi_scalar_mul([ (scalars[0], curve.G), (scalars[1], precomputed) ]), expected)
+
+	def test_lru_cache(self):
+		cache = Tools.LRUCache(2)
+		cache.put("a", 1)
+		cache.put("b", 2)
+		self.assertEqual(cache.get("a"), 1)
+		cache.put("c", 3)
+		self.assertNotIn("b", cache)
+		self.assertEqual(cache.get("a"), 1)
+		self.assertEqual(cache.get("c"), 3)
+		self.assertEqual(len(cache), 2)
@@ -38,3 +38,4 @@ from .PolyTests import PolyTests
 from .DivPolyTests import DivPolyTests
 from .CRTTests import CRTTests
 from .TwistTests import TwistTests
+from .ScalarMulTests import ScalarMulTests
@@ -0,0 +1,98 @@
+import unittest
+import unittest.mock
+import os
+
+import MTTools
+from MTTools import MT_Hash, MT_Hash_many, MT_SHA256
+from MTTools import MTBse64Encode, MTBse64Decode, MTBse64Decoder
+from MTTools import MT_Transform, MT_TransformRev, MT_Transform_many, MT_TransformRev_many
+
+# License payload of JKLM-NBYX.key and its decoded value, see README.md
+PAYLOAD = "VIhB6/0yhAE1MS8JVjH7Qbw3pTtkCl+yuWVK3lTvh1HZuMYTZfzV17711ZBGkYVYR7bdJFrJZtGzc4IyOqPjEA=="
+DECODED = bytes.fromhex(
+    "15 12 06 fa 4f cb 21 40 d4 8c c4 27 d5 78 ec d0"
+    "06 df e9 d4 92 42 e9 cb ae 55 29 77 39 bd 61 7d"
+    "64 2e 83 4d d9 37 57 f5 be d7 75 16 18 24 56 61"
+    "d1 be 75 49 b1 26 59 6b cc 1c 8e c8 8e fa 8c 04")
+
+class MTToolsTests(unittest.TestCase):
+    def test_hash_many(self):
+        messages = [ os.urandom(length) for length in [ 0, 55, 56, 63, 64, 119, 16, 55, 200 ] ]
+        expected = [ MT_Hash(m) for m in messages ]
+        self.assertEqual(MT_Hash_many(messages), expected)
+        self.assertEqual(MT_Hash_many([ bytearray(m) for m in messages ]), expected)
+        self.assertEqual(MT_Hash_many([]), [])
+        self.assertEqual(MT_Hash(b'', MT_SHA256), MT_Hash(b''))
+
+    def test_hash_many_without_numpy(self):
+        messages = [ os.urandom(length) for length in [ 0, 55, 56, 63, 64, 119 ] ]
+        with unittest.mock.patch.object(MTTools, 'numpy', None):
+            self.assertEqual(MT_Hash_many(messages), [ MT_Hash(m) for m in messages ])
+
+    def test_base64_vector(self):
+        self.assertEqual(MTBse64Decode(PAYLOAD), DECODED)
+        self.assertEqual(MTBse64Decode(PAYLOAD.encode('ascii')), DECODED)
+        self.assertEqual(MTBse64Encode(DECODED, padd = True), PAYLOAD)
+        self.assertEqual(MTBse64Encode(DECODED), PAYLOAD.rstrip('='))
+
+    def test_base64_roundtrip(self):
+        for length in range(12):
+            data = os.urandom(length)
+            self.assertEqual(MTBse64Decode(MTBse64Encode(data)), data)
+            self.assertEqual(MTBse64Decode(MTBse64Encode(data, padd = True)), data)
+
+    def test_base64_chunked(self):
+        # Split everywhere, i.e. in the middle of groups and between the padding characters
+        for i in range(len(PAYLOAD) + 1):
+            decoder = MTBse64Decoder()
+            self.assertEqual(decoder.update(PAYLOAD[:i]) + decoder.update(PAYLOAD[i:]) + decoder.final(), DECODED)
+
+        decoder = MTBse64Decoder()
+        self.assertEqual(b''.join(decoder.update(c) for c in PAYLOAD) + decoder.final(), DECODED)
+
+        # Padding ends a group, so padded payloads can be concatenated
+        data = [ os.urandom(length) for length in [ 64, 1, 2, 3, 5 ] ]
+        payload = ''.join(MTBse64Encode(d, padd = True) for d in data)
+        for i in range(len(payload) + 1):
+            decoder = MTBse64Decoder()
+            self.assertEqual(decoder.update(payload[:i]) + decoder.update(payload[i:]) + decoder.final(), b''.join(data))
+
+    def test_base64_whitespace(self):
+        wrapped = '\r\n'.join(PAYLOAD[i:i+10] for i in range(0, len(PAYLOAD), 10))
+        self.assertEqual(MTBse64Decode(wrapped), DECODED)
+        self.assertEqual(MTBse64Decode(' \t' + PAYLOAD[:7] + ' \n\v\f' + PAYLOAD[7:] + '\n'), DECODED)
+        self.assertEqual(MTBse64Decode(' \r\n'), b'')
+
+    def test_base64_invalid(self):
+        for payload in [ '#' + PAYLOAD[1:], PAYLOAD[:20] + '-' + PAYLOAD[20:], PAYLOAD + '.', '\x00' ]:
+            with self.assertRaises(ValueError):
+                MTBse64Decode(payload)
+        with self.assertRaises(ValueError):
+            MTBse64Decode('\u00e4')
+        decoder = MTBse64Decoder()
+        decoder.update(PAYLOAD[:10])
+        with self.assertRaises(ValueError):
+            decoder.update(b'AB*C')
+
+    def test_transform(self):
+        # Transformed first 16 bytes of the JKLM-NBYX license, see README.md
+        self.assertEqual(MT_Transform(DECODED[:16])[:8], bytes.fromhex("d8 d1 70 a6 4c 00 06 01"))
+        for i in range(8):
+            block = os.urandom(16)
+            self.assertEqual(MT_TransformRev(MT_Transform(block)), block)
+            self.assertEqual(MT_Transform(MT_TransformRev(block)), block)
+
+    def test_transform_many(self):
+        blocks = DECODED[:16] + os.urandom(16 * 20)
+        expected = b''.join(MT_Transform(blocks[i:i+16]) for i in range(0, len(blocks), 16))
+        self.assertEqual(MT_Transform_many(blocks), expected)
+        self.assertEqual(MT_TransformRev_many(expected), blocks)
+        self.assertEqual(MT_TransformRev_many(MT_Transform_many(blocks)), blocks)
+        self.assertEqual(MT_Transform_many(b''), b'')
+        if MTTools.numpy is not None:
+            array = MTTools.numpy.frombuffer(blocks, dtype = '>u4').reshape(-1, 4)
+            self.assertEqual(MT_Transform_many(array), expected)
+
+        with unittest.mock.patch.object(MTTools, 'numpy', None):
+            self.assertEqual(MT_Transform_many(blocks), expected)
+            self.assertEqual(MT_TransformRev_many(expected), blocks)
@@ -0,0 +1,125 @@
+import unittest
+import io
+import os
+import contextlib
+import tempfile
+
+import ParseLic
+from ParseLic import scan_licenses, LicenseBlock, LicenseVerifier, LicenseFormatError, verify_licenses, verify_keyed_licenses
+from MTTools import MTBse64Decode, MTBse64Encode
+
+with open(os.path.join(os.path.dirname(__file__), '..', 'JKLM-NBYX.key'), 'rb') as f:
+    KEY = f.read()
+PAYLOAD = "VIhB6/0yhAE1MS8JVjH7Qbw3pTtkCl+yuWVK3lTvh1HZuMYTZfzV17711ZBGkYVYR7bdJFrJZtGzc4IyOqPjEA=="
+BEGIN = b'-----BEGIN MIKROTIK SOFTWARE KEY------------'
+
+def _flipped(payload, index):
+    lic = bytearray(MTBse64Decode(payload))
+    lic[index] ^= 0x01
+    return MTBse64Encode(lic, padd = True)
+
+# Malformed licenses: invalid character, too short, BEGIN line without END line
+MALFORMED = [ '#' + PAYLOAD[1:], PAYLOAD[:40], BEGIN.decode('ascii') + '\n' + PAYLOAD ]
+
+class ParseLicTests(unittest.TestCase):
+    def _scan(self, data, **kwargs):
+        results = [ list(scan_licenses(io.BytesIO(data), chunksize = chunksize, **kwargs)) for chunksize in [ 1, 7, 16, 65536 ] ]
+        for result in results[1:]:
+            self.assertEqual(result, results[0])
+        return results[0]
+
+    def test_scan_crlf(self):
+        self.assertIn(b'\r\n', KEY)
+        self.assertEqual(self._scan(KEY), [ LicenseBlock(offset = 0, length = len(KEY), license = PAYLOAD) ])
+        lf = KEY.replace(b'\r\n', b'\n')
+        self.assertEqual(self._scan(lf), [ LicenseBlock(offset = 0, length = len(lf), license = PAYLOAD) ])
+
+    def test_scan_offsets(self):
+        data = b'garbage\n' + KEY + b'\r\n\r\nmore garbage' + KEY + b' trailing ----'
+        self.assertEqual(self._scan(data), [
+            LicenseBlock(offset = 8, length = len(KEY), license = PAYLOAD),
+            LicenseBlock(offset = 8 + len(KEY) + 16, length = len(KEY), license = PAYLOAD),
+        ])
+        self.assertEqual(self._scan(b''), [ ])
+        self.assertEqual(self._scan(b'no license ' * 100), [ ])
+
+    def test_scan_concatenated(self):
+        # The END line's dashes are directly followed by the next BEGIN line's dashes
+        data = KEY + KEY + KEY.rstrip(b'-')
+        self.assertEqual(self._scan(data), [
+            LicenseBlock(offset = 0, length = len(KEY), license = PAYLOAD),
+            LicenseBlock(offset = len(KEY), length = len(KEY), license = PAYLOAD),
+            LicenseBlock(offset = 2 * len(KEY), length = len(KEY.rstrip(b'-')), license = PAYLOAD),
+        ])
+
+    def test_scan_missing_end(self):
+        data = BEGIN + b'\n' + b'A' * 5000 + b'\n' + KEY
+        self.assertEqual(self._scan(data, maxlength = 4096), [ LicenseBlock(offset = len(data) - len(KEY), length = len(KEY), license = PAYLOAD) ])
+        self.assertEqual(self._scan(KEY[:-40]), [ ])
+        self.assertEqual(self._scan(KEY + BEGIN + b'\nAAAA'), [ LicenseBlock(offset = 0, length = len(KEY), license = PAYLOAD) ])
+
+    def test_scan_nested_begin(self):
+        data = BEGIN + b'\r\nAAAA\r\n' + KEY
+        self.assertEqual(self._scan(data), [ LicenseBlock(offset = len(data) - len(KEY), length = len(KEY), license = PAYLOAD) ])
+
+    def test_verify(self):
+        verifier = LicenseVerifier()
+        for lic in [ KEY, KEY.decode('ascii'), PAYLOAD, LicenseBlock(offset = 0, length = 0, license = PAYLOAD) ]:
+            result = verifier.verify(lic)
+            self.assertEqual((result.swid, result.swsn, result.level), ('JKLM-NBYX', 0x004ca670d1d8, 1))
+            self.assertTrue(result.valid)
+            self.assertIsNone(result.error)
+
+        # Flipped bits in the signature or in the compared hash
+        for index in [ 16, 31, 32, 63 ]:
+            result = verifier.verify(_flipped(PAYLOAD, index))
+            self.assertFalse(result.valid)
+            self.assertIsNone(result.error)
+
+        for lic in MALFORMED:
+            with self.assertRaises(LicenseFormatError):
+                verifier.verify(lic)
+
+    def test_verify_licenses(self):
+        licenses = [ PAYLOAD ] + MALFORMED + [ _flipped(PAYLOAD, 40), KEY ]
+        results = list(verify_licenses(licenses))
+        self.assertEqual([ result.valid for result in results ], [ True, False, False, False, False, True ])
+        for result in results[1:4]:
+            self.assertIsInstance(result.error, LicenseFormatError)
+            self.assertIsNone(result.swid)
+        self.assertEqual(results[4].swid, 'JKLM-NBYX')
+        self.assertIsNone(results[4].error)
+
+    def test_verify_keyed_licenses_pool(self):
+        # Longer than one window of 4 * chunksize * processes licenses
+        licenses = [ PAYLOAD, MALFORMED[0], _flipped(PAYLOAD, 20), MALFORMED[1], KEY, MALFORMED[2] ] * 4
+        items = [ (('file%d' % (i % 3), i), lic) for (i, lic) in enumerate(licenses) ]
+        summary = lambda result: (result.swid, result.level, result.hash, result.valid, repr(result.error))
+        serial = [ (key, summary(result)) for (key, result) in verify_keyed_licenses(items) ]
+        pooled = [ (key, summary(result)) for (key, result) in verify_keyed_licenses(iter(items), processes = 2, chunksize = 1) ]
+        self.assertEqual([ key for (key, result) in pooled ], [ key for (key, lic) in items ])
+        self.assertEqual(pooled, serial)
+        self.assertEqual([ result[3] for (key, result) in serial ][:6], [ True, False, False, False, True, False ])
+        self.assertEqual([ summary(result) for result in verify_licenses(licenses, LicenseVerifier(), processes = 2, chunksize = 2) ], [ result for (key, result) in serial ])
+
+    def _main(self, *filenames):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            ret = ParseLic.main([ 'ParseLic.py' ] + list(filenames))
+        return (ret, output.getvalue())
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            keyfile = os.path.join(tmpdir, 'good.key')
+            with open(keyfile, 'wb') as f:
+                f.write(KEY)
+            (ret, output) = self._main(keyfile)
+            self.assertEqual(ret, 0)
+            self.assertTrue(output.endswith('OK - License valid\n'))
+
+            badfile = os.path.join(tmpdir, 'bad.key')
+            with open(badfile, 'wb') as f:
+                f.write(KEY.replace(PAYLOAD[:8].encode('ascii'), b'#' + PAYLOAD[1:8].encode('ascii')))
+            self.assertEqual(self._main(badfile), (1, 'Not a Mikrotik license file\n'))
+            self.assertEqual(self._main(keyfile, badfile), (0,
+                '%s:0: JKLM-NBYX level 1 OK\n%s:0: Not a Mikrotik license (Invalid MTBase64 character)\n' % (keyfile, badfile)))
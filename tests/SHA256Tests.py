@@ -0,0 +1,70 @@
+import unittest
+import hashlib
+import os
+import struct
+
+from SHA256 import SHA256, FastSHA256
+from MTTools import MT_SHA256, MT_FastSHA256
+
+class SHA256Tests(unittest.TestCase):
+    def test_fast_process_block(self):
+        # A message of up to 55 bytes is padded to exactly one block
+        for length in [ 0, 1, 31, 55 ]:
+            msg = os.urandom(length)
+            (block, ) = SHA256._pad_message(msg, length * 8)
+            state = FastSHA256._process_block(block)
+            self.assertEqual(struct.pack('>8L', *state), hashlib.sha256(msg).digest())
+
+        for i in range(8):
+            block = os.urandom(64)
+            state = SHA256.State(*struct.unpack('>8L', os.urandom(32)))
+            self.assertEqual(FastSHA256._process_block(block, state), SHA256._process_block(block, state))
+
+    def test_fast_digest(self):
+        for length in [ 0, 1, 55, 56, 63, 64, 65, 119, 127, 128, 1000 ]:
+            msg = os.urandom(length)
+            self.assertEqual(FastSHA256(msg).digest(), hashlib.sha256(msg).digest())
+            self.assertEqual(SHA256(msg).digest(), hashlib.sha256(msg).digest())
+
+    def test_mt_fast_digest(self):
+        for length in [ 0, 16, 32, 55, 56, 64, 119 ]:
+            msg = os.urandom(length)
+            self.assertEqual(MT_FastSHA256(msg).digest(), MT_SHA256(msg).digest())
+        self.assertNotEqual(MT_FastSHA256(b'').digest(), hashlib.sha256(b'').digest())
+
+    def test_copy(self):
+        prefix = os.urandom(100)
+        h = FastSHA256(prefix)
+        for suffix in [ b'', os.urandom(10), os.urandom(28), os.urandom(200) ]:
+            c = h.copy()
+            c.update(suffix)
+            self.assertEqual(c.digest(), hashlib.sha256(prefix + suffix).digest())
+        self.assertEqual(h.digest(), hashlib.sha256(prefix).digest())
+
+    def test_midstate_block_boundary(self):
+        for length in [ 0, 64, 128 ]:
+            prefix = os.urandom(length)
+            h = SHA256(prefix)
+            midstate = h.midstate()
+            self.assertEqual(midstate.length, length * 8)
+            self.assertEqual(midstate.round_offset, length)
+
+            r = FastSHA256.from_midstate(*midstate)
+            r.update(b'suffix')
+            self.assertEqual(r.digest(), hashlib.sha256(prefix + b'suffix').digest())
+
+    def test_midstate_buffered(self):
+        # Buffered data is not part of the midstate and has to be passed again
+        data = os.urandom(150)
+        h = MT_FastSHA256(data)
+        midstate = h.midstate()
+        self.assertEqual(midstate.length, 128 * 8)
+        self.assertEqual(midstate.round_offset, 128)
+
+        r = MT_FastSHA256.from_midstate(*midstate)
+        r.update(data[128:])
+        self.assertEqual(r.digest(), MT_SHA256(data).digest())
+        self.assertEqual(r.midstate(), h.midstate())
+
+        with self.assertRaises(AssertionError):
+            SHA256.from_midstate(midstate.state, 150 * 8)
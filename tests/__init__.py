@@ -0,0 +1,3 @@
+from .SHA256Tests import SHA256Tests
+from .MTToolsTests import MTToolsTests
+from .ParseLicTests import ParseLicTests